@@ -0,0 +1,288 @@
+"""Times the data pipeline on synthetic multi-year study histories.
+
+Run from the src folder with `python -m benchmarks.pipeline`. Every history
+size runs in a fresh interpreter on a temporary data folder, so the real data
+is never touched. Qt runs on the offscreen platform, no display is needed.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Histories end here, so windows and results are the same on every run
+END_TIME = datetime.datetime(2025, 1, 1)
+
+# Share of hours with study time in the synthetic histories
+STUDIED_HOUR_RATIO = 0.3
+
+
+def generate_history(subjects: int, years: int, seed: int = 0) -> None:
+    """Writes subjects with hourly rows over years to the data folder."""
+    import numpy
+    import polars
+    from util.schemas import study_time_schema
+    from util.storage import get_subject_path, replace_data
+
+    rng = numpy.random.default_rng(seed)
+    start_time = END_TIME.replace(year=END_TIME.year - years)
+    hours = polars.datetime_range(
+        start_time, END_TIME, "1h", closed="left", time_unit="us", eager=True
+    )
+
+    for i in range(subjects):
+        studied = rng.random(len(hours)) < STUDIED_HOUR_RATIO
+        df = polars.DataFrame(
+            {
+                "timestamp": hours.filter(studied),
+                "studied_seconds": rng.integers(1, 3601, int(studied.sum())),
+            }
+        ).cast(study_time_schema)
+        replace_data(df, get_subject_path(f"Subject {i + 1}"))
+
+
+def time_operation(function, repeat: int) -> dict[str, float]:
+    """Returns median and minimum run time of function in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(times), "min_ms": min(times)}
+
+
+def run_config(subjects: int, years: int, repeat: int, consolidated: bool) -> dict:
+    """Times each pipeline step on one history size, returns name to timings."""
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    from components.graphs import AbstractPlotWidget
+    from pages.home_page import HomePage
+    from util import storage
+    from util.util import (
+        get_seconds_per_interval,
+        get_studied_seconds,
+        get_total_hours_of_all_subjects,
+        preprocess_data,
+    )
+
+    start = time.perf_counter()
+    generate_history(subjects, years)
+    if consolidated:
+        storage.migrate_to_consolidated_store()
+    results = {"generate": {"median_ms": (time.perf_counter() - start) * 1000}}
+
+    subject = "Subject 1"
+    year_start = END_TIME.replace(year=END_TIME.year - 1)
+    month_start = END_TIME.replace(month=12)
+    week_start = END_TIME - datetime.timedelta(days=7)
+
+    # Reading and processing the windows of the statistics page, the first
+    # query of the hourly series builds its cache file
+    results["read_series_cold"] = time_operation(
+        lambda: storage.read_series(subject), 1
+    )
+    windows = {
+        "Week": (week_start, "1d"),
+        "Month": (month_start, "1d"),
+        "Year": (year_start, "1mo"),
+    }
+    results["read_subject_year"] = time_operation(
+        lambda: storage.read_subject(subject, year_start, END_TIME), repeat
+    )
+    results["read_subject_all"] = time_operation(
+        lambda: storage.read_subject(subject), repeat
+    )
+    hourly = storage.read_subject(subject, year_start, END_TIME)
+    results["preprocess_data_year_hourly"] = time_operation(
+        lambda: preprocess_data(hourly.lazy(), year_start, END_TIME).collect(), repeat
+    )
+    for zoom_level, (window_start, interval) in windows.items():
+        df = storage.read_rollup(subject, interval, window_start, END_TIME)
+        df_processed = preprocess_data(
+            df.lazy(), window_start, END_TIME, interval
+        ).collect()
+        results[f"read_rollup_{zoom_level.lower()}"] = time_operation(
+            lambda s=window_start, i=interval: storage.read_rollup(
+                subject, i, s, END_TIME
+            ),
+            repeat,
+        )
+        results[f"preprocess_data_{zoom_level.lower()}"] = time_operation(
+            lambda d=df, s=window_start, i=interval: preprocess_data(
+                d.lazy(), s, END_TIME, i
+            ).collect(),
+            repeat,
+        )
+        results[f"aggregate_data_{zoom_level.lower()}"] = time_operation(
+            lambda d=df_processed, z=zoom_level: AbstractPlotWidget.aggregate_data(
+                None, d, z
+            ),
+            repeat,
+        )
+        results[f"seconds_per_interval_{zoom_level.lower()}"] = time_operation(
+            lambda s=window_start, i=interval: get_seconds_per_interval(
+                subject, s, END_TIME, i
+            ),
+            repeat,
+        )
+
+    # Totals are the input of the pie chart, the first call builds missing series
+    results["totals_cold"] = time_operation(get_total_hours_of_all_subjects, 1)
+    results["totals_warm"] = time_operation(get_total_hours_of_all_subjects, repeat)
+    results["total_year"] = time_operation(
+        lambda: get_studied_seconds(subject, year_start, END_TIME), repeat
+    )
+
+    # What the home page does once its data request returns
+    home_page = HomePage()
+    home_page.resize(720, 600)
+
+    def refresh_home_page() -> None:
+        home_page.total_study_time_pie_chart.reset_values()
+        home_page.load_plots(get_total_hours_of_all_subjects())
+
+    results["home_page_refresh"] = time_operation(refresh_home_page, repeat)
+
+    # Saving a session and merging the journal into the compacted data
+    save_time = END_TIME - datetime.timedelta(hours=1)
+    results["save_session"] = time_operation(
+        lambda: storage.flush_session(subject, {save_time: 60}), repeat
+    )
+    results["compact_subject"] = time_operation(
+        lambda: (
+            storage.append_study_time(subject, save_time, 60),
+            storage.compact_subject(subject),
+        ),
+        repeat,
+    )
+
+    app.processEvents()
+    return results
+
+
+def run_config_in_process(
+    subjects: int, years: int, repeat: int, consolidated: bool
+) -> dict:
+    """Runs one history size in a fresh interpreter with a temporary data folder."""
+    src_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as home:
+        env = {
+            **os.environ,
+            "HOME": home,
+            "LOCALAPPDATA": home,
+            "QT_QPA_PLATFORM": "offscreen",
+        }
+        command = [
+            sys.executable,
+            "-m",
+            "benchmarks.pipeline",
+            "--run-config",
+            str(subjects),
+            str(years),
+            "--repeat",
+            str(repeat),
+        ]
+        if consolidated:
+            command.append("--consolidated")
+        output = subprocess.run(
+            command, cwd=src_path, env=env, capture_output=True, text=True, check=True
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def get_commit() -> str | None:
+    """Returns the current git commit, if the source is in a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(report: dict, baseline: dict | None) -> None:
+    """Prints timings per history size, with the change against a baseline."""
+    baseline_results = {
+        (r["subjects"], r["years"], r["operation"]): r["median_ms"]
+        for r in (baseline or {}).get("results", [])
+    }
+
+    for result in report["results"]:
+        line = (
+            f"{result['subjects']:>3} subjects {result['years']:>2} years  "
+            f"{result['operation']:<28}{result['median_ms']:>10.2f} ms"
+        )
+        old = baseline_results.get(
+            (result["subjects"], result["years"], result["operation"])
+        )
+        if old:
+            line += f"  {(result['median_ms'] - old) / old:+7.1%}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--subjects", type=int, nargs="+", default=[1, 10, 50], help="subject counts"
+    )
+    parser.add_argument(
+        "--years", type=int, nargs="+", default=[1, 5, 20], help="history lengths"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="runs per operation")
+    parser.add_argument(
+        "--consolidated", action="store_true", help="use the consolidated store"
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare")
+    parser.add_argument("--run-config", type=int, nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child process of a single history size
+    if args.run_config:
+        subjects, years = args.run_config
+        print(json.dumps(run_config(subjects, years, args.repeat, args.consolidated)))
+        return
+
+    report = {
+        "commit": get_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "consolidated": args.consolidated,
+        "repeat": args.repeat,
+        "results": [],
+    }
+    for subjects in args.subjects:
+        for years in args.years:
+            results = run_config_in_process(
+                subjects, years, args.repeat, args.consolidated
+            )
+            report["results"] += [
+                {"subjects": subjects, "years": years, "operation": name, **timings}
+                for name, timings in results.items()
+            ]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+    print_results(report, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Measures frame times of the clock and the graph animations.
+
+Run from the src folder with `python -m benchmarks.render`. Widgets are drawn
+on the offscreen Qt platform unless QT_QPA_PLATFORM says otherwise.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import time
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Returns the nearest-rank percentile of values."""
+    values = sorted(values)
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+def summarize(times: list[float]) -> dict[str, float]:
+    """Returns p50, p99 and count of frame times in milliseconds."""
+    return {
+        "p50_ms": percentile(times, 50),
+        "p99_ms": percentile(times, 99),
+        "frames": len(times),
+    }
+
+
+def run_event_loop(app, seconds: float) -> None:
+    """Processes events, including timers, for a number of seconds."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def benchmark_clock(app, size: int, session: bool, seconds: float) -> dict:
+    """Times paint events of the clock, driven by its timer and fully repainted."""
+    from components.clock import Clock
+
+    class TimedClock(Clock):
+        def __init__(self):
+            super().__init__()
+            self.paint_times: list[float] = []
+
+        def paintEvent(self, event):
+            start = time.perf_counter()
+            super().paintEvent(event)
+            self.paint_times.append((time.perf_counter() - start) * 1000)
+
+    clock = TimedClock()
+    clock.resize(size, size)
+    if session:
+        clock.set_start_time(datetime.datetime.now() - datetime.timedelta(minutes=73))
+    clock.show()
+    run_event_loop(app, 0.2)
+
+    # Frames as the timer schedules them, usually only the changed regions
+    clock.paint_times.clear()
+    run_event_loop(app, seconds)
+    timer_times = clock.paint_times[:]
+
+    # Whole widget painted at once, as after an expose, time stands still here
+    clock.paint_times.clear()
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        clock.repaint()
+    full_times = clock.paint_times[:]
+
+    clock.close()
+    return {"timer": summarize(timer_times), "full": summarize(full_times)}
+
+
+def get_bar_data(bars: int, scale: int):
+    """Returns a processed frame with one day per bar."""
+    import polars
+    from util.util import preprocess_data
+
+    start = datetime.datetime(2000, 1, 1)
+    timestamps = [start + datetime.timedelta(days=i) for i in range(bars)]
+    df = polars.DataFrame(
+        {
+            "timestamp": timestamps,
+            "studied_seconds": [(i * 7 + scale) % 10 * 600 for i in range(bars)],
+        },
+        schema={"timestamp": polars.Datetime("us"), "studied_seconds": polars.Int32},
+    )
+    end = timestamps[-1] + datetime.timedelta(days=1)
+    return preprocess_data(df.lazy(), start, end, "1d").collect()
+
+
+def run_animations(app, widget, load, loads: int) -> tuple[list[float], list[float]]:
+    """Runs animations, returns times of animate calls and of whole frames."""
+    animate_times = []
+    frame_times = []
+
+    for i in range(loads):
+        load(i)
+
+        # Animation steps without drawing
+        for frame in range(widget.frames + 1):
+            start = time.perf_counter()
+            widget.animate(frame)
+            animate_times.append((time.perf_counter() - start) * 1000)
+
+        # Frames as the animation timer draws them, including the blit
+        widget.frame_times.clear()
+        while widget._animation_timer.isActive():
+            app.processEvents()
+            time.sleep(0.001)
+        frame_times += widget.frame_times
+
+    return animate_times, frame_times
+
+
+def benchmark_bars(app, bars: int, loads: int) -> dict:
+    """Times animation frames of the bar plot with a number of bars."""
+    from components.graphs import BarPlotWidget
+
+    widget = BarPlotWidget()
+    widget.resize(800, 400)
+    widget.show()
+
+    data = [get_bar_data(bars, scale) for scale in range(2)]
+    animate_times, frame_times = run_animations(
+        app,
+        widget,
+        lambda i: widget.load_data(data[i % 2], "Study time", "Month"),
+        loads,
+    )
+
+    widget.close()
+    return {"animate": summarize(animate_times), "frame": summarize(frame_times)}
+
+
+def benchmark_pie(app, loads: int) -> dict:
+    """Times animation frames of the center text of the pie chart."""
+    from components.graphs import PieChartWidget
+
+    widget = PieChartWidget()
+    widget.resize(600, 600)
+    widget.show()
+
+    def load(i: int) -> None:
+        widget.load_data({"Math": 10.0 + i % 2, "Physics": 5.0, "History": 2.5})
+
+    # animate only delegates to animate_center_text
+    animate_times, frame_times = run_animations(app, widget, load, loads)
+
+    widget.close()
+    return {"animate": summarize(animate_times), "frame": summarize(frame_times)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--clock-sizes", type=int, nargs="+", default=[200, 400, 800], help="pixels"
+    )
+    parser.add_argument(
+        "--bars", type=int, nargs="+", default=[24, 365, 3650], help="bar counts"
+    )
+    parser.add_argument(
+        "--seconds", type=float, default=2.0, help="clock time per scenario"
+    )
+    parser.add_argument("--loads", type=int, default=5, help="animations per graph")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from PySide6.QtWidgets import QApplication
+    from styles.style import apply_style
+
+    app = QApplication.instance() or QApplication([])
+    apply_style(app)
+
+    results = {}
+    for size in args.clock_sizes:
+        for session in (False, True):
+            state = "session" if session else "idle"
+            clock_results = benchmark_clock(app, size, session, args.seconds)
+            for kind, summary in clock_results.items():
+                results[f"clock_{size}px_{state}_{kind}"] = summary
+    for bars in args.bars:
+        for kind, summary in benchmark_bars(app, bars, args.loads).items():
+            results[f"bars_{bars}_{kind}"] = summary
+    for kind, summary in benchmark_pie(app, args.loads).items():
+        results[f"pie_center_text_{kind}"] = summary
+
+    print(f"{'scenario':<32}{'p50':>10}{'p99':>10}{'frames':>8}")
+    for name, summary in results.items():
+        print(
+            f"{name:<32}{summary['p50_ms']:>8.2f}ms{summary['p99_ms']:>8.2f}ms"
+            f"{summary['frames']:>8}"
+        )
+
+    if args.output:
+        report = {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qt_platform": app.platformName(),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Measures cold startup time of the app.
+
+Run from the src folder with `python -m benchmarks.startup`. Each run starts a
+fresh interpreter with a temporary data folder so imports are measured cold
+and the real data is not touched. Runs without a display unless QT_QPA_PLATFORM
+is set.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Executed in a fresh interpreter for every run
+_RUN_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+
+from PySide6.QtWidgets import QApplication
+from components.main_window import MainWindow
+from styles.style import apply_style
+import_done = time.perf_counter()
+
+app = QApplication(sys.argv)
+apply_style(app)
+window = MainWindow(lazy={lazy})
+result = {{}}
+
+def on_first_frame():
+    result["import_ms"] = (import_done - start) * 1000
+    result["first_frame_ms"] = (time.perf_counter() - start) * 1000
+    result["matplotlib_loaded"] = "matplotlib" in sys.modules
+    result["polars_loaded"] = "polars" in sys.modules
+    app.quit()
+
+window.first_frame.connect(on_first_frame)
+window.show()
+app.exec()
+print(json.dumps(result))
+"""
+
+
+def run_once(lazy: bool) -> dict:
+    """Starts the app in a new process and returns its startup timings."""
+    src_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as home:
+        env = {
+            **os.environ,
+            "HOME": home,
+            "LOCALAPPDATA": home,
+            "QT_QPA_PLATFORM": os.environ.get("QT_QPA_PLATFORM", "offscreen"),
+        }
+        output = subprocess.run(
+            [sys.executable, "-c", _RUN_SCRIPT.format(lazy=lazy)],
+            cwd=src_path,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="runs per mode")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for mode, lazy in (("eager", False), ("lazy", True)):
+        runs = [run_once(lazy) for _ in range(args.runs)]
+        results[mode] = {
+            "import_ms": statistics.median(run["import_ms"] for run in runs),
+            "first_frame_ms": statistics.median(run["first_frame_ms"] for run in runs),
+            "matplotlib_loaded": runs[0]["matplotlib_loaded"],
+            "polars_loaded": runs[0]["polars_loaded"],
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Median of {args.runs} runs")
+    print(f"{'mode':<8}{'import':>10}{'first frame':>14}  modules at first frame")
+    for mode, result in results.items():
+        modules = [
+            name for name in ("matplotlib", "polars") if result[f"{name}_loaded"]
+        ]
+        print(
+            f"{mode:<8}{result['import_ms']:>8.0f}ms{result['first_frame_ms']:>12.0f}ms"
+            f"  {', '.join(modules) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Command line queries over the study data, without Qt or matplotlib."""
+
+import argparse
+import datetime
+import sys
+
+import polars
+from util.storage import get_all_subjects
+from util.util import get_processed_df_from_subject, get_total_hours_of_all_subjects
+
+# Interval and label format of each table period
+PERIODS = {"day": ("1d", "%Y-%m-%d"), "month": ("1mo", "%Y-%m")}
+
+
+def get_totals(
+    timestamp_start: datetime.datetime | None = None,
+    timestamp_end: datetime.datetime | None = None,
+) -> polars.DataFrame:
+    """Returns studied hours per subject in the window, or of all time."""
+    totals = get_total_hours_of_all_subjects(timestamp_start, timestamp_end)
+    return polars.DataFrame(
+        {"subject": list(totals), "hours": list(totals.values())},
+        schema={"subject": polars.String, "hours": polars.Float64},
+    )
+
+
+def get_table(
+    subjects: list[str],
+    period: str,
+    timestamp_start: datetime.datetime | None = None,
+    timestamp_end: datetime.datetime | None = None,
+) -> polars.DataFrame:
+    """Returns studied hours per subject and day or month."""
+    interval, fmt = PERIODS[period]
+
+    frames = []
+    for subject in subjects:
+        df = get_processed_df_from_subject(
+            subject, timestamp_start, timestamp_end, interval
+        )
+        frames.append(
+            df.select(
+                polars.lit(subject).alias("subject"),
+                polars.col("timestamp").dt.strftime(fmt).alias(period),
+                polars.col("studied_hours").alias("hours"),
+            )
+        )
+
+    schema = {"subject": polars.String, period: polars.String, "hours": polars.Float64}
+    return polars.concat(frames) if frames else polars.DataFrame(schema=schema)
+
+
+def format_table(df: polars.DataFrame) -> str:
+    """Returns the DataFrame as aligned plain text."""
+    rows = [df.columns] + [
+        [f"{value:.2f}" if isinstance(value, float) else str(value) for value in row]
+        for row in df.iter_rows()
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(df.columns))]
+
+    lines = []
+    for row in rows:
+        cells = [
+            cell.rjust(width) if df.dtypes[i].is_numeric() else cell.ljust(width)
+            for i, (cell, width) in enumerate(zip(row, widths, strict=True))
+        ]
+        lines.append("  ".join(cells).rstrip())
+    return "\n".join(lines) + "\n"
+
+
+def write_output(df: polars.DataFrame, fmt: str, output: str | None) -> None:
+    """Writes the DataFrame as a table, CSV or JSON to output or stdout."""
+    match fmt:
+        case "csv":
+            text = df.write_csv()
+        case "json":
+            text = df.write_json() + "\n"
+        case _:
+            text = format_table(df)
+
+    if output is None:
+        sys.stdout.write(text)
+    else:
+        with open(output, "w", encoding="utf-8", newline="") as file:
+            file.write(text)
+
+
+def parse_date(value: str) -> datetime.datetime:
+    """Parses an ISO date or date and time."""
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: {value!r}") from None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="study-tracker", description="Query the recorded study time."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # Shared output options
+    output_parser = argparse.ArgumentParser(add_help=False)
+    output_parser.add_argument(
+        "-f",
+        "--format",
+        choices=["table", "csv", "json"],
+        default="table",
+        help="output format (default: table)",
+    )
+    output_parser.add_argument(
+        "-o", "--output", help="write to this file instead of stdout"
+    )
+
+    # Shared window options
+    window_parser = argparse.ArgumentParser(add_help=False)
+    window_parser.add_argument("--start", type=parse_date, help="first date to include")
+    window_parser.add_argument(
+        "--end", type=parse_date, help="date to stop at, not included"
+    )
+
+    subparsers.add_parser(
+        "totals",
+        parents=[output_parser, window_parser],
+        help="total hours per subject",
+    )
+    subparsers.add_parser("subjects", help="list subjects")
+
+    for period in PERIODS:
+        period_parser = subparsers.add_parser(
+            period,
+            parents=[output_parser, window_parser],
+            help=f"hours per subject and {period}",
+        )
+        period_parser.add_argument(
+            "subjects", nargs="*", help="subjects to include (default: all)"
+        )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "subjects":
+        for subject in get_all_subjects():
+            print(subject)
+        return 0
+
+    if args.command == "totals":
+        df = get_totals(args.start, args.end)
+    else:
+        subjects = get_all_subjects()
+        unknown = [subject for subject in args.subjects if subject not in subjects]
+        if unknown:
+            parser.error(f"unknown subject: {', '.join(unknown)}")
+        df = get_table(args.subjects or subjects, args.command, args.start, args.end)
+
+    write_output(df, args.format, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,22 @@
 import datetime
 import math
+from collections import OrderedDict
 
 from PySide6.QtCore import QPoint, QPointF, QRectF, Qt, QTimer
-from PySide6.QtGui import QFont, QPainter, QPainterPath, QPaintEvent, QPen, QPixmap
+from PySide6.QtGui import (
+    QFont,
+    QFontMetricsF,
+    QPainter,
+    QPainterPath,
+    QPaintEvent,
+    QPen,
+    QPixmap,
+    QRegion,
+    QTransform,
+)
 from PySide6.QtWidgets import QWidget
 from styles.colors import Colors
+from util.profiling import traced
 
 
 class Clock(QWidget):
@@ -12,9 +24,20 @@ class Clock(QWidget):
         super().__init__(parent)
         self.setObjectName("Clock")
 
+        # Frame rate while a session is timed and while idle, paused when hidden
+        self.fps_active = 144
+        self.fps_idle = 10
+
         self.__timer = QTimer(self)
-        self.__timer.timeout.connect(self.repaint)
-        self.__timer.start(1000 / 144)
+        self.__timer.timeout.connect(self.__update_frame)
+
+        # Time shown by the current frame and regions that change between frames
+        self.__frame_time = datetime.datetime.now()
+        self.__dirty_rects: list[QRectF] = []
+
+        # Pre-rendered arc text keyed by text, font size and color
+        self.text_cache_size = 256
+        self.__text_cache: OrderedDict[tuple, tuple[QPixmap, QPointF]] = OrderedDict()
 
         # Constants
         self.hand_second_length = 0.75
@@ -218,6 +241,15 @@ class Clock(QWidget):
         )
         painter.drawArc(rect, int((-start_angle + 90) * 16), int(-span_angle * 16))
 
+    def __calculate_arc_text_position(self, length: float, mid_angle: float) -> QPointF:
+        """Returns baseline position of the numeric text on arc."""
+        mid_angle_rad = math.radians(mid_angle)
+        text_radius = length * 0.90
+        return QPointF(
+            self.centerX + math.cos(mid_angle_rad) * text_radius - text_radius * 0.05,
+            self.centerY + math.sin(mid_angle_rad) * text_radius + text_radius * 0.05,
+        )
+
     def __draw_arc_text(
         self,
         painter: QPainter,
@@ -227,19 +259,36 @@ class Clock(QWidget):
         text: str,
     ) -> None:
         """Paints the numeric text on arc."""
-        mid_angle_rad = math.radians(mid_angle)
-        font = QFont("Arial", self.radius // 10)
+        pixmap, offset = self.__get_arc_text_pixmap(text, self.radius // 10, fill_color)
 
         # Position text
-        text_radius = length * 0.90
-        text_x = (
-            self.centerX + math.cos(mid_angle_rad) * text_radius - text_radius * 0.05
-        )
-        text_y = (
-            self.centerY + math.sin(mid_angle_rad) * text_radius + text_radius * 0.05
-        )
+        position = self.__calculate_arc_text_position(length, mid_angle)
+        painter.drawPixmap(position + offset, pixmap)
+
+    def __get_arc_text_pixmap(
+        self, text: str, font_size: float, fill_color: str
+    ) -> tuple[QPixmap, QPointF]:
+        """Returns pixmap of the text and its offset from the text baseline."""
+        key = (text, font_size, fill_color)
+        if key in self.__text_cache:
+            self.__text_cache.move_to_end(key)
+            return self.__text_cache[key]
+
+        font = QFont("Arial", font_size)
         path = QPainterPath()
-        path.addText(text_x, text_y, font, text)
+        path.addText(0, 0, font, text)
+
+        # Leave room for the outline
+        rect = path.boundingRect().adjusted(-2, -2, 2, 2)
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap((rect.size() * ratio).toSize())
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.translate(-rect.topLeft())
+        painter.setBrush(fill_color)
 
         # Outline
         painter.setPen(self.pen_border_black)
@@ -247,21 +296,107 @@ class Clock(QWidget):
 
         # Fill
         painter.setPen(fill_color)
-        painter.setBrush(fill_color)
         painter.drawPath(path)
+        painter.end()
+
+        self.__text_cache[key] = (pixmap, rect.topLeft())
+        if len(self.__text_cache) > self.text_cache_size:
+            self.__text_cache.popitem(last=False)
+
+        return self.__text_cache[key]
+
+    def __calculate_dirty_rects(self, now: datetime.datetime) -> list[QRectF]:
+        """Returns bounding rectangles of everything that moves between frames."""
+        angles = self.__calculate_clock_hand_angles(now)
+        hands = (self.hand_second, self.hand_minute, self.hand_hour)
+
+        rects = []
+        for hand, angle in zip(hands, angles, strict=True):
+            transform = QTransform().translate(self.centerX, self.centerY).rotate(angle)
+            rects.append(transform.map(hand).boundingRect())
+
+        if self.start_time is not None:
+            angles_start = self.__calculate_clock_hand_angles(self.start_time)
+            lengths = (
+                self.radius * self.hand_second_length,
+                self.radius * self.hand_minute_length,
+                self.radius * self.hand_hour_length,
+            )
+            metrics = QFontMetricsF(QFont("Arial", self.radius // 10))
+            # Widest label the arc text can show
+            text_rect = metrics.boundingRect("00000")
+
+            for length, angle_start, angle in zip(
+                lengths, angles_start, angles, strict=True
+            ):
+                span_angle, mid_angle = self.__calculate_span_angles(angle_start, angle)
+
+                # Arc between start and current hand
+                arc_rect = QRectF(
+                    self.centerX - length, self.centerY - length, length * 2, length * 2
+                )
+                arc = QPainterPath()
+                arc.arcMoveTo(arc_rect, -angle_start + 90)
+                arc.arcTo(arc_rect, -angle_start + 90, -span_angle)
+                rects.append(arc.boundingRect())
+
+                # Numeric text on arc
+                position = self.__calculate_arc_text_position(length, mid_angle)
+                rects.append(text_rect.translated(position))
+
+        return rects
+
+    def __update_frame(self) -> None:
+        """Schedules a repaint of only the regions that changed since last frame."""
+        self.__frame_time = datetime.datetime.now()
+        rects = self.__calculate_dirty_rects(self.__frame_time)
+
+        # Pad for pen widths and antialiasing
+        region = QRegion()
+        for rect in rects + self.__dirty_rects:
+            region = region.united(rect.toAlignedRect().adjusted(-4, -4, 4, 4))
+        self.__dirty_rects = rects
+
+        # Coalesced by Qt into a single paint event
+        self.update(region)
+
+    def __restart_timer(self) -> None:
+        """Starts the frame timer at the rate matching the clock state."""
+        if not self.isVisible():
+            self.__timer.stop()
+            return
+
+        fps = self.fps_idle if self.start_time is None else self.fps_active
+        self.__timer.start(1000 / fps)
 
     def set_start_time(self, time: datetime.datetime):
         """Set start time."""
         self.start_time = time
+        self.__restart_timer()
+        self.update()
 
     def set_stop_time(self, time: datetime.datetime):
         """Set stop time."""
         self.stop_time = time
+        self.update()
 
     def reset_times(self):
         """Clears time."""
         self.start_time = None
         self.stop_time = None
+        self.__restart_timer()
+        self.update()
+
+    def showEvent(self, event):
+        """Resume animation when visible."""
+        super().showEvent(event)
+        self.__frame_time = datetime.datetime.now()
+        self.__restart_timer()
+
+    def hideEvent(self, event):
+        """Pause animation when hidden."""
+        super().hideEvent(event)
+        self.__timer.stop()
 
     def resizeEvent(self, event):
         """Resize items."""
@@ -297,8 +432,11 @@ class Clock(QWidget):
         self.hand_hour_stop = self.__create_clock_hand(
             self.radius * self.hand_hour_length, self.radius * self.hand_hour_width
         )
+        self.__dirty_rects = []
+        self.__text_cache.clear()
         super().resizeEvent(event)
 
+    @traced("paint")
     def paintEvent(self, event: QPaintEvent) -> None:
         """Draws clock animation."""
         super().paintEvent(event)
@@ -309,7 +447,8 @@ class Clock(QWidget):
         painter.drawPixmap(0, 0, self.background)
         painter.setOpacity(1.0)
 
-        now = datetime.datetime.now()
+        # Paint the time the dirty regions were calculated for
+        now = self.__frame_time
         angle_second, angle_minute, angle_hour = self.__calculate_clock_hand_angles(now)
 
         # Start clock hands
@@ -0,0 +1,97 @@
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import (
+    QDialog,
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+from util.profiling import clear_spans, dump_trace, get_span_stats
+from util.storage import get_series_cache_stats
+
+COLUMNS = ["Span", "Category", "Count", "Total ms", "Mean ms", "Max ms"]
+
+
+class DebugPanel(QDialog):
+    """Shows timings of recent spans while profiling is enabled."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Timings")
+        self.resize(640, 420)
+
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        # Windows of the statistics page are read from the cached series
+        self.cache_label = QLabel()
+        layout.addWidget(self.cache_label)
+
+        # Buttons
+        button_layout = QHBoxLayout()
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(self.clear)
+        save_button = QPushButton("Save trace")
+        save_button.clicked.connect(self.save_trace)
+        button_layout.addWidget(clear_button)
+        button_layout.addWidget(save_button)
+        layout.addLayout(button_layout)
+
+        # Refresh while visible
+        self.__timer = QTimer(self)
+        self.__timer.timeout.connect(self.update_table)
+
+    def update_table(self) -> None:
+        """Fills the table with the current span statistics."""
+        stats = get_span_stats()
+        self.table.setRowCount(len(stats))
+        for row, entry in enumerate(stats):
+            values = [
+                entry["name"],
+                entry["category"],
+                str(entry["count"]),
+                f"{entry['total_ms']:.1f}",
+                f"{entry['mean_ms']:.2f}",
+                f"{entry['max_ms']:.2f}",
+            ]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        self.table.resizeColumnsToContents()
+
+        stats = get_series_cache_stats()
+        self.cache_label.setText(
+            f"Series cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['subjects']} subjects"
+        )
+
+    def clear(self) -> None:
+        """Removes recorded spans."""
+        clear_spans()
+        self.update_table()
+
+    def save_trace(self) -> None:
+        """Writes recorded spans to a Chrome trace file."""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save trace", "trace.json", "Chrome trace (*.json)"
+        )
+        if path:
+            dump_trace(path)
+
+    def showEvent(self, event):
+        """Starts refreshing the table."""
+        super().showEvent(event)
+        self.update_table()
+        self.__timer.start(1000)
+
+    def hideEvent(self, event):
+        """Stops refreshing the table."""
+        super().hideEvent(event)
+        self.__timer.stop()
@@ -1,5 +1,5 @@
 from PySide6.QtWidgets import QComboBox
-from util.util import get_data_path
+from util.storage import get_all_subjects
 
 
 class SubjectDropdown(QComboBox):
@@ -8,14 +8,10 @@ class SubjectDropdown(QComboBox):
 
     def load_subjects_in_dropdown(self, subject: str = "General") -> None:
         """Reloads subjects in the dropdown menu."""
-        parquet_files = [
-            file.name for file in get_data_path().iterdir() if file.suffix == ".parquet"
-        ]
         self.clear()
 
         # Load each subject
-        for file_name in parquet_files:
-            subject_name = file_name.replace(".parquet", "")
+        for subject_name in get_all_subjects():
             self.addItem(subject_name)
 
         # Preselect subject
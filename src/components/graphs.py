@@ -1,10 +1,16 @@
+import datetime
+import time
+from collections import deque
+
+import numpy
 import polars
-from matplotlib.animation import FuncAnimation
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QVBoxLayout, QWidget
 from styles.colors import Colors
-from util.util import ease_in_out_quad, set_xaxis_labels
+from util.plotting import ease_in_out_quad, set_xaxis_labels
+from util.profiling import span, traced
 
 
 class AbstractPlotWidget(QWidget):
@@ -26,6 +32,19 @@ class AbstractPlotWidget(QWidget):
 
         self._ax = None
 
+        # Animation runs for a fixed number of frames at the frame time target
+        self.frames = 30
+        self.frame_time_target = 1000 / 60
+        self.frame_times: deque[float] = deque(maxlen=120)
+
+        self._animation_timer = QTimer(self)
+        self._animation_timer.timeout.connect(self._step_animation)
+        self._animation_start = None
+
+        # Static parts of the figure, captured after every full draw
+        self._background = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
     def get_colors(self) -> dict[str, str]:
         """Returns a dictionary of theme colors."""
         return {
@@ -40,6 +59,50 @@ class AbstractPlotWidget(QWidget):
         """Should reset certain values when changing data source."""
         pass
 
+    def get_animated_artists(self) -> list:
+        """Should return artists that change during the animation."""
+        return []
+
+    def animate(self, i):
+        """Should update animated artists for frame i."""
+        return self.get_animated_artists()
+
+    def start_animation(self, redraw: bool) -> None:
+        """Animates artists, redrawing the static background only if needed."""
+        if redraw or self._background is None:
+            with span("canvas draw", "draw"):
+                self.canvas.draw()
+
+        self._animation_start = time.perf_counter()
+        self._animation_timer.start(int(self.frame_time_target))
+
+    def _on_draw(self, event) -> None:
+        """Captures static background and draws animated artists on top."""
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self.get_animated_artists():
+            self.figure.draw_artist(artist)
+
+    @traced("draw")
+    def _step_animation(self) -> None:
+        """Draws the next frame by blitting animated artists onto the background."""
+        frame_start = time.perf_counter()
+
+        # Frames follow elapsed time, so slow frames are skipped not stretched
+        elapsed = (frame_start - self._animation_start) * 1000
+        i = min(elapsed / self.frame_time_target, self.frames)
+        self.animate(i)
+
+        self.canvas.restore_region(self._background)
+        for artist in self.get_animated_artists():
+            self.figure.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)
+
+        if i >= self.frames:
+            self._animation_timer.stop()
+
+        self.frame_times.append((time.perf_counter() - frame_start) * 1000)
+
+    @traced("process")
     def aggregate_data(
         self, df: polars.DataFrame, zoom_level: str
     ) -> tuple[polars.DataFrame, str]:
@@ -94,8 +157,8 @@ class BarPlotWidget(AbstractPlotWidget):
         super().__init__(parent)
 
         self._bars = None
-        self._animation = None
         self._ylim = None
+        self._timestamps = None
 
     def get_bar_width(self, timestamps: list[polars.Datetime]) -> float:
         """Calculates bar width based on timestamp range."""
@@ -110,27 +173,58 @@ class BarPlotWidget(AbstractPlotWidget):
         """Resets certain values when changing data source."""
         self._ax = None
         self._bars = None
-        self._animation = None
+        self._background = None
+        self._animation_timer.stop()
         self._values = None
         self._max_value = None
         self._previous_values = None
         self._ylim = None
+        self._timestamps = None
         self.figure.clear()
 
+    @traced("plot")
     def load_data(self, df: polars.DataFrame, title: str, zoom_level: str):
         """Loads data for plotting."""
 
         df, ylabel = self.aggregate_data(df, zoom_level)
 
-        timestamps = df["timestamp"].to_list()
-        values = df["value"].to_list()
+        self.load_values(
+            df["timestamp"].to_list(), df["value"].to_list(), title, ylabel, zoom_level
+        )
 
+    @traced("plot")
+    def load_seconds(
+        self,
+        timestamps: list[datetime.datetime],
+        seconds: numpy.ndarray,
+        title: str,
+        zoom_level: str,
+    ):
+        """Loads studied seconds per bar, in minutes for a day and hours otherwise."""
+        if zoom_level == "Day":
+            values, ylabel = seconds / 60, "Minutes"
+        else:
+            values, ylabel = seconds / 3600, "Hours"
+
+        self.load_values(timestamps, values.tolist(), title, ylabel, zoom_level)
+
+    def load_values(
+        self,
+        timestamps: list[datetime.datetime],
+        values: list[float],
+        title: str,
+        ylabel: str,
+        zoom_level: str,
+    ):
+        """Loads one value per bar for plotting."""
         self._max_value = max(values) if values else 1
 
+        # Bars are only rebuilt when the window or zoom level changes
+        timestamps_changed = self._bars is None or timestamps != self._timestamps
         self._timestamps = timestamps
 
         # Save current values as previous before updating
-        if self._values is None:
+        if self._values is None or timestamps_changed:
             self._previous_values = [0] * len(values)
         else:
             # Keep old values as previous
@@ -143,6 +237,9 @@ class BarPlotWidget(AbstractPlotWidget):
             self._ylim = max(self._max_value * 1.1, 1)
             ylim_changed = True
 
+        # Static background only has to be redrawn if axes change
+        redraw = self._ax is None or ylim_changed or timestamps_changed
+
         if self._ax is None:
             self._ax = self.figure.add_subplot(111, facecolor=self.colors["background"])
 
@@ -167,31 +264,31 @@ class BarPlotWidget(AbstractPlotWidget):
 
         if ylim_changed:
             self._ax.set_ylim(0, self._ylim)
-            self.canvas.draw()
-
-        self._bars = self._ax.bar(
-            timestamps,
-            self._previous_values,
-            color=self.colors["bar"],
-            edgecolor=self.colors["bar_edge"],
-            linewidth=0.5,
-            width=self.get_bar_width(timestamps),
-        )
+
+        if timestamps_changed:
+            if self._bars is not None:
+                self._bars.remove()
+                set_xaxis_labels(self._ax, timestamps, zoom_level)
+
+            self._bars = self._ax.bar(
+                timestamps,
+                self._previous_values,
+                color=self.colors["bar"],
+                edgecolor=self.colors["bar_edge"],
+                linewidth=0.5,
+                width=self.get_bar_width(timestamps),
+                animated=True,
+            )
 
         # Animate
-        self._animation = FuncAnimation(
-            self.figure,
-            self.animate,
-            frames=30,
-            interval=1000 // 60,
-            blit=True,
-            repeat=False,
-        )
+        self.start_animation(redraw)
 
-        self.canvas.draw()
+    def get_animated_artists(self) -> list:
+        """Returns the bars."""
+        return list(self._bars) if self._bars is not None else []
 
     def animate(self, i):
-        frames = 30
+        frames = self.frames
         frame = i / frames
         eased_t = ease_in_out_quad(frame)
         for bar, value, previous_value in zip(
@@ -218,15 +315,16 @@ class PieChartWidget(AbstractPlotWidget):
         self._previous_total_hours = 0.0
         self._total_hours = 0.0
         self._labels = None
-        self.canvas.clear()
+        self._background = None
+        self._animation_timer.stop()
+        self.figure.clear()
 
-    def load_data(self, dfs: dict[str, polars.DataFrame]):
+    @traced("plot")
+    def load_data(self, totals: dict[str, float]):
         """Loads data for plotting."""
 
-        # Calculate hourly sums for each subject
-        data = [
-            (subject, float(df["studied_hours"].sum())) for subject, df in dfs.items()
-        ]
+        # Total studied hours for each subject
+        data = list(totals.items())
 
         if not data:
             return  # Nothing to plot
@@ -293,25 +391,24 @@ class PieChartWidget(AbstractPlotWidget):
                 fontsize=20,
                 fontweight="bold",
                 color=self.colors["text"],
+                animated=True,
             )
         else:
             self._previous_values = self._values
             self._values = main_values
 
-        # Animation
-        self._animation = FuncAnimation(
-            self.figure,
-            self.animate_center_text,
-            frames=30,
-            interval=1000 // 60,
-            blit=True,
-            repeat=False,
-        )
+        # Animation, the pie itself is only redrawn when it changed
+        self.start_animation(labels_changed or values_changed)
+
+    def get_animated_artists(self) -> list:
+        """Returns the center text."""
+        return [self._center_text] if self._ax is not None else []
 
-        self.canvas.draw()
+    def animate(self, i):
+        return self.animate_center_text(i)
 
     def animate_center_text(self, i):
-        frames = 30
+        frames = self.frames
         t = ease_in_out_quad(i / frames)
 
         current_total = (
@@ -1,34 +1,45 @@
 from components.sidebar import Sidebar
-from pages.home_page import HomePage
-from pages.statistics_page import StatisticsPage
-from pages.study_page import StudyPage
+from PySide6.QtCore import QTimer, Signal
+from PySide6.QtGui import QKeySequence, QShortcut
 from PySide6.QtWidgets import QHBoxLayout, QMainWindow, QStackedWidget, QWidget
+from util import profiling
+from util.data_service import get_data_service
+from util.event_bus import get_event_bus
+
+# Order of the pages in the stacked widget
+PAGE_HOME, PAGE_STUDY, PAGE_STATISTICS = range(3)
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # Emitted once the window has been painted for the first time
+    first_frame = Signal()
+
+    def __init__(self, lazy: bool = True):
         super().__init__()
 
         self.setWindowTitle("Study Tracker")
         self.setGeometry(100, 100, 920, 640)
         self.setMinimumWidth(475)
 
+        self.__first_frame_shown = False
+
+        # Reads wait for recovery, which may still move files around
+        get_data_service().hold_reads()
+
         # Create sidebar
         self.sidebar = Sidebar(self)
 
         # Create stacked widget for content area
         self.stacked_widget = QStackedWidget(self)
 
-        # Create pages for the stacked widget
-        self.page_home = HomePage()
-        self.page_study = StudyPage()
-        self.page_statistics = StatisticsPage()
-        self.page_statistics.update_subject_list()
+        # Add placeholders, pages are built when first needed
+        self.__pages: list[QWidget | None] = [None, None, None]
+        for _ in self.__pages:
+            self.stacked_widget.addWidget(QWidget())
 
-        # Add pages to stacked widget
-        self.stacked_widget.addWidget(self.page_home)
-        self.stacked_widget.addWidget(self.page_study)
-        self.stacked_widget.addWidget(self.page_statistics)
+        if not lazy:
+            for index in range(len(self.__pages)):
+                self.get_page(index)
 
         # Create layout to manage sidebar and content area
         central_widget = QWidget(self)
@@ -38,10 +49,113 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(central_widget)
 
         # Connect sidebar buttons to switch pages in the stacked widget
-        self.sidebar.button_home.clicked.connect(lambda: self.switch_page(0))
-        self.sidebar.button_study.clicked.connect(lambda: self.switch_page(1))
-        self.sidebar.button_statistics.clicked.connect(lambda: self.switch_page(2))
+        self.sidebar.button_home.clicked.connect(lambda: self.switch_page(PAGE_HOME))
+        self.sidebar.button_study.clicked.connect(lambda: self.switch_page(PAGE_STUDY))
+        self.sidebar.button_statistics.clicked.connect(
+            lambda: self.switch_page(PAGE_STATISTICS)
+        )
+
+        # Timings of recent spans, only recorded when profiling is enabled
+        self.debug_panel = None
+        if profiling.ENABLED:
+            QShortcut(QKeySequence("Ctrl+Shift+P"), self, self.show_debug_panel)
+
+    @property
+    def page_home(self):
+        return self.get_page(PAGE_HOME)
+
+    @property
+    def page_study(self):
+        return self.get_page(PAGE_STUDY)
+
+    @property
+    def page_statistics(self):
+        return self.get_page(PAGE_STATISTICS)
+
+    def get_page(self, index: int) -> QWidget:
+        """Returns the page at index, building it on first use."""
+        page = self.__pages[index]
+        if page is None:
+            page = self.__build_page(index)
+            self.__pages[index] = page
+
+            # Swap placeholder for the page
+            is_current = self.stacked_widget.currentIndex() == index
+            placeholder = self.stacked_widget.widget(index)
+            self.stacked_widget.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.stacked_widget.insertWidget(index, page)
+            if is_current:
+                self.stacked_widget.setCurrentIndex(index)
+        return page
+
+    def __build_page(self, index: int) -> QWidget:
+        """Creates the page at index."""
+        # Pages import matplotlib and polars, so only load them when needed
+        if index == PAGE_HOME:
+            from pages.home_page import HomePage
+
+            return HomePage()
+        if index == PAGE_STUDY:
+            from pages.study_page import StudyPage
+
+            return StudyPage()
+
+        from pages.statistics_page import StatisticsPage
+
+        page = StatisticsPage()
+        page.update_subject_list()
+        return page
+
+    def show_debug_panel(self) -> None:
+        """Opens the panel with timings of recent spans."""
+        if self.debug_panel is None:
+            from components.debug_panel import DebugPanel
+
+            self.debug_panel = DebugPanel(self)
+        self.debug_panel.show()
+        self.debug_panel.raise_()
 
     def switch_page(self, index):
         """Switch pages in the stacked widget"""
+        self.get_page(index)
         self.stacked_widget.setCurrentIndex(index)
+
+    def paintEvent(self, event):
+        """Builds the visible page once the first frame is on screen."""
+        super().paintEvent(event)
+        if not self.__first_frame_shown:
+            self.__first_frame_shown = True
+            self.first_frame.emit()
+            QTimer.singleShot(0, self.__on_first_frame)
+
+    def __on_first_frame(self) -> None:
+        """Recovers interrupted writes and builds the visible page."""
+        from util.storage import recover_data
+
+        get_data_service().submit(
+            None,
+            recover_data,
+            callback=self.__on_sessions_recovered,
+            error_callback=get_data_service().release_reads,
+        )
+        self.get_page(self.stacked_widget.currentIndex())
+
+    def __on_sessions_recovered(self, subjects: list[str]) -> None:
+        """Shows the recovered study time on the pages."""
+        get_data_service().release_reads()
+
+        event_bus = get_event_bus()
+        if subjects:
+            event_bus.subjects_changed.emit()
+        for subject in subjects:
+            event_bus.study_time_changed.emit(subject, None)
+
+    def closeEvent(self, event):
+        """Finish pending writes before closing."""
+        page_study = self.__pages[PAGE_STUDY]
+        if page_study is not None and page_study.is_timing:
+            page_study.timer_update(save=True)
+
+        get_data_service().wait_for_done()
+        super().closeEvent(event)
@@ -0,0 +1,15 @@
+from util.storage import get_store_path, migrate_to_consolidated_store
+
+
+def main():
+    # Move per-subject parquet files into one store partitioned by year
+    count = migrate_to_consolidated_store()
+
+    if count:
+        print(f"Migrated {count} subjects to {get_store_path()}")
+    else:
+        print(f"Nothing to migrate, store already exists at {get_store_path()}")
+
+
+if __name__ == "__main__":
+    main()
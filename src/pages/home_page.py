@@ -1,9 +1,8 @@
-import datetime
-
-import polars
 from components.graphs import PieChartWidget
 from PySide6.QtWidgets import QVBoxLayout, QWidget
-from util.util import get_all_subjects, get_processed_df_from_subject
+from util.data_service import get_data_service
+from util.event_bus import get_event_bus
+from util.util import get_total_hours_of_all_subjects
 
 
 class HomePage(QWidget):
@@ -15,22 +14,42 @@ class HomePage(QWidget):
         self.total_study_time_pie_chart = PieChartWidget(self)
         self.layout.addWidget(self.total_study_time_pie_chart)
 
+        self.__reset = False
+        self.__stale = False
+
+        # Totals change with any study time
+        get_event_bus().study_time_changed.connect(self.on_study_time_changed)
+
+        self.update_plots()
+
+    def on_study_time_changed(self, subject: str, rows) -> None:
+        """Updates the totals after study time was added."""
         self.update_plots()
 
     def update_plots(self, reset=False):
-        """Updates plots on this page."""
-        all_subjects = get_all_subjects()
+        """Requests data for the plots on this page, or on next show if hidden."""
+        # Keep reset if a previous request gets replaced by this one
+        self.__reset = self.__reset or reset
 
-        if all_subjects:
-            dfs: dict[str, polars.DataFrame] = {}
-            timestamp_end = datetime.datetime.now() + datetime.timedelta(days=1)
+        self.__stale = not self.isVisible()
+        if self.__stale:
+            return
 
-            for subject in all_subjects:
-                dfs[subject] = get_processed_df_from_subject(
-                    subject, timestamp_end=timestamp_end
-                )
+        get_data_service().submit(
+            "home", get_total_hours_of_all_subjects, callback=self.load_plots
+        )
 
-            if reset:
+    def load_plots(self, totals: dict[str, float]) -> None:
+        """Updates plots on this page."""
+        if totals:
+            if self.__reset:
                 self.total_study_time_pie_chart.reset_values()
+            self.__reset = False
+
+            self.total_study_time_pie_chart.load_data(totals)
 
-            self.total_study_time_pie_chart.load_data(dfs)
+    def showEvent(self, event):
+        """Loads data that changed while the page was hidden."""
+        super().showEvent(event)
+        if self.__stale:
+            self.update_plots()
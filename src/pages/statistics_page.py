@@ -1,9 +1,10 @@
 import datetime
 
+import numpy
 from components.dropdown import SubjectDropdown
 from components.graphs import BarPlotWidget
 from dateutil.relativedelta import relativedelta
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont
 from PySide6.QtWidgets import (
     QButtonGroup,
@@ -13,7 +14,10 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
-from util.util import get_processed_df_from_subject
+from util.constants import ZOOM_LEVEL_INTERVALS
+from util.data_service import get_data_service
+from util.event_bus import get_event_bus
+from util.util import add_rows_to_intervals, get_seconds_per_interval
 
 
 class StatisticsPage(QWidget):
@@ -29,6 +33,26 @@ class StatisticsPage(QWidget):
         )
         self.layout.addWidget(self.subject_dropdown)
 
+        self.__reset = False
+        self.__stale = False
+
+        # Bounds and seconds of each bar of the loaded window, patched in memory
+        # with saves and the running session
+        self.__boundaries: list[datetime.datetime] | None = None
+        self.__seconds: numpy.ndarray | None = None
+        self.__zoom_level = None
+        self.__session: tuple[str, dict[datetime.datetime, int]] | None = None
+        self.__loading = False
+        self.__redraw = False
+
+        # Boundaries and seconds of windows next to the loaded one by subject,
+        # start and zoom level, dropped on every change of the study time
+        self.__prefetched: dict[
+            tuple[str, datetime.datetime, str],
+            tuple[list[datetime.datetime], numpy.ndarray],
+        ] = {}
+        self.__prefetch_generation = 0
+
         self.timestamp_start: datetime.datetime | None = None
         self.timestamp_end: datetime.datetime | None = None
         self.zoom_delta = None
@@ -70,11 +94,59 @@ class StatisticsPage(QWidget):
         # Set default to days
         self.set_zoom_level(self.zoom_buttons.buttons()[0])
 
+        # Reload only for changes inside the visible window
+        event_bus = get_event_bus()
+        event_bus.study_time_changed.connect(self.on_study_time_changed)
+        event_bus.session_progress.connect(self.on_session_progress)
+        event_bus.subjects_changed.connect(self.update_subject_list)
+
     def update_subject_list(self) -> None:
         self.subject_dropdown.load_subjects_in_dropdown(
             self.subject_dropdown.get_current_subject()
         )
 
+    def on_study_time_changed(
+        self, subject: str, rows: dict[datetime.datetime, int] | None
+    ) -> None:
+        """Updates plots if the changed hours are in the current window."""
+        self.__prefetched.clear()
+        self.__prefetch_generation += 1
+
+        if subject != self.subject_dropdown.get_current_subject():
+            return
+
+        if rows is not None and not self.is_in_window(rows):
+            return
+
+        # A window being loaded may or may not include the saved rows
+        if rows is None or self.__loading or self.__seconds is None:
+            self.update_plots()
+            return
+
+        self.__seconds = add_rows_to_intervals(self.__boundaries, self.__seconds, rows)
+        self.redraw_plots()
+
+    def on_session_progress(
+        self, subject: str, rows: dict[datetime.datetime, int]
+    ) -> None:
+        """Shows unsaved time of the running session without reading the disk."""
+        if subject != self.subject_dropdown.get_current_subject():
+            return
+
+        old_rows = self.__session[1] if self.__session is not None else {}
+        self.__session = (subject, rows)
+
+        # Loading windows include the session once they are drawn
+        if self.__loading or self.__seconds is None:
+            return
+
+        if self.is_in_window(rows) or self.is_in_window(old_rows):
+            self.redraw_plots()
+
+    def is_in_window(self, rows: dict[datetime.datetime, int]) -> bool:
+        """Checks if any of the hours is in the current window."""
+        return any(self.timestamp_start <= hour < self.timestamp_end for hour in rows)
+
     def update_date_range_label(self) -> None:
         """Updates the label of the date range."""
         zoom_level = self.zoom_buttons.checkedButton().text()
@@ -106,6 +178,21 @@ class StatisticsPage(QWidget):
         self.update_date_range_label()
         self.update_plots(reset=True)
 
+    def get_zoom_window(
+        self, zoom: str, day: datetime.datetime
+    ) -> tuple[datetime.datetime, datetime.timedelta | relativedelta]:
+        """Returns start and length of the window of a zoom level containing day."""
+        match zoom:
+            case "Day":
+                return day, datetime.timedelta(days=1)
+            case "Week":
+                start = day - datetime.timedelta(days=day.weekday())
+                return start, datetime.timedelta(days=7)
+            case "Month":
+                return day.replace(day=1), relativedelta(months=1)
+            case _:
+                return day.replace(month=1, day=1), relativedelta(years=1)
+
     def set_zoom_level(self, button: QPushButton) -> None:
         """Changes the zoom level of which data to view."""
         zoom = button.text()
@@ -113,38 +200,151 @@ class StatisticsPage(QWidget):
             hour=0, minute=0, second=0, microsecond=0
         )
         # Set start and end time
-        match zoom:
-            case "Day":
-                self.zoom_delta = datetime.timedelta(days=1)
-                self.timestamp_start = current_day
-            case "Week":
-                self.zoom_delta = datetime.timedelta(days=7)
-                self.timestamp_start = current_day - datetime.timedelta(
-                    days=current_day.weekday()
-                )
-            case "Month":
-                self.zoom_delta = relativedelta(months=1)
-                self.timestamp_start = current_day.replace(day=1)
-            case "Year":
-                self.zoom_delta = relativedelta(years=1)
-                self.timestamp_start = current_day.replace(month=1, day=1)
+        self.timestamp_start, self.zoom_delta = self.get_zoom_window(zoom, current_day)
         self.timestamp_end = self.timestamp_start + self.zoom_delta
         # Update data
         self.update_date_range_label()
         self.update_plots(reset=True)
 
     def update_plots(self, reset=False):
-        """Updates plots on this page."""
+        """Requests data for the plots on this page, or on next show if hidden."""
         subject = self.subject_dropdown.get_current_subject()
 
         if subject:
-            df_processed = get_processed_df_from_subject(
-                subject, self.timestamp_start, self.timestamp_end
-            )
+            # Keep reset if a previous request gets replaced by this one
+            self.__reset = self.__reset or reset
 
-            if reset:
-                self.study_time_bar_plot.reset_values()
+            self.__stale = not self.isVisible()
+            if self.__stale:
+                return
 
-            # Update plots
+            # Windows next to the previous one are drawn at once
             zoom_level = self.zoom_buttons.checkedButton().text()
-            self.study_time_bar_plot.load_data(df_processed, "Study time", zoom_level)
+            prefetched = self.__prefetched.get(
+                (subject, self.timestamp_start, zoom_level)
+            )
+            if prefetched is not None:
+                get_data_service().cancel("statistics")
+                self.load_plots(*prefetched, zoom_level)
+                return
+
+            # Sums per bar come from the prefix sums of the hourly series
+            self.__loading = True
+            get_data_service().submit(
+                "statistics",
+                get_seconds_per_interval,
+                subject,
+                self.timestamp_start,
+                self.timestamp_end,
+                ZOOM_LEVEL_INTERVALS[zoom_level],
+                callback=lambda result: self.load_plots(*result, zoom_level),
+                error_callback=self.on_load_failed,
+            )
+
+    def on_load_failed(self) -> None:
+        """Drops the loaded window, so the next change loads it again."""
+        self.__loading = False
+        self.__boundaries = None
+        self.__seconds = None
+
+    def load_plots(
+        self,
+        boundaries: list[datetime.datetime],
+        seconds: numpy.ndarray,
+        zoom_level: str,
+    ) -> None:
+        """Updates plots on this page."""
+        self.__loading = False
+        self.__boundaries = boundaries
+        self.__seconds = seconds
+        self.__zoom_level = zoom_level
+
+        if self.__reset:
+            self.study_time_bar_plot.reset_values()
+        self.__reset = False
+
+        self.draw_plots()
+        self.prefetch_windows(zoom_level)
+
+    def prefetch_windows(self, zoom_level: str) -> None:
+        """Loads the windows next to the current one in the background."""
+        subject = self.subject_dropdown.get_current_subject()
+        self.__prefetched.clear()
+
+        windows = {
+            "previous": (zoom_level, self.timestamp_start - self.zoom_delta),
+            "next": (zoom_level, self.timestamp_start + self.zoom_delta),
+        }
+
+        # Window the next zoom level out opens with, e.g. the month of today
+        zoom_levels = list(ZOOM_LEVEL_INTERVALS)
+        if zoom_level != zoom_levels[-1]:
+            current_day = datetime.datetime.now().replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+            parent_zoom_level = zoom_levels[zoom_levels.index(zoom_level) + 1]
+            windows["parent"] = (parent_zoom_level, current_day)
+
+        # Replaced on the next navigation, results of older data are dropped
+        generation = self.__prefetch_generation
+        for name, (zoom, day) in windows.items():
+            start, delta = self.get_zoom_window(zoom, day)
+            get_data_service().submit(
+                f"statistics-prefetch-{name}",
+                get_seconds_per_interval,
+                subject,
+                start,
+                start + delta,
+                ZOOM_LEVEL_INTERVALS[zoom],
+                callback=lambda result, key=(subject, start, zoom): (
+                    self.on_window_prefetched(key, result, generation)
+                ),
+            )
+
+    def on_window_prefetched(
+        self,
+        key: tuple[str, datetime.datetime, str],
+        result: tuple[list[datetime.datetime], numpy.ndarray],
+        generation: int,
+    ) -> None:
+        """Keeps a prefetched window unless the study time changed meanwhile."""
+        if generation == self.__prefetch_generation:
+            self.__prefetched[key] = result
+
+    def draw_plots(self) -> None:
+        """Draws the loaded window with the running session added."""
+        self.__redraw = False
+
+        seconds = self.__seconds
+        if self.__session is not None:
+            subject, rows = self.__session
+            if subject == self.subject_dropdown.get_current_subject():
+                seconds = add_rows_to_intervals(self.__boundaries, seconds, rows)
+
+        # Update plots
+        self.study_time_bar_plot.load_seconds(
+            self.__boundaries[:-1], seconds, "Study time", self.__zoom_level
+        )
+
+    def redraw_plots(self) -> None:
+        """Draws the patched window once back in the event loop, or on next show.
+
+        A save is followed by the session progress without the saved seconds,
+        waiting draws both at once instead of counting the seconds twice.
+        """
+        if not self.__redraw and self.isVisible():
+            QTimer.singleShot(0, self.draw_pending_plots)
+        self.__redraw = True
+
+    def draw_pending_plots(self) -> None:
+        """Draws the patched window unless it was drawn meanwhile."""
+        if self.__redraw and self.isVisible():
+            self.draw_plots()
+
+    def showEvent(self, event):
+        """Loads data that changed while the page was hidden."""
+        super().showEvent(event)
+        if self.__stale:
+            self.update_plots()
+        elif self.__redraw:
+            self.draw_plots()
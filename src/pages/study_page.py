@@ -1,6 +1,5 @@
 import datetime
 
-import polars
 from components.clock import Clock
 from components.dropdown import SubjectDropdown
 from PySide6.QtCore import QTimer
@@ -14,9 +13,17 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
-from util.constants import DATA_FILE
-from util.schemas import study_time_schema
-from util.util import get_data_path
+from util.constants import SESSION_FLUSH_INTERVAL, SESSION_RECOVERY_INTERVAL
+from util.data_service import get_data_service
+from util.event_bus import get_event_bus
+from util.session import StudySession
+from util.storage import (
+    append_recovery,
+    compact_subject_in_background,
+    create_subject,
+    flush_session,
+    get_all_subjects,
+)
 
 
 class StudyPage(QWidget):
@@ -32,18 +39,24 @@ class StudyPage(QWidget):
         self.stop_time = datetime.datetime.now()
         self.minutes = 0
         self.hours = 0
+        self.session: StudySession | None = None
+        # Subject and seconds per hour of each save that has not finished yet
+        self.saving_rows: list[tuple[str, dict[datetime.datetime, int]]] = []
+        self.last_flush_time = datetime.datetime.now()
+        self.last_recovery_time = datetime.datetime.now()
 
         layout = QVBoxLayout(self)
 
         # Subjects
         subject_layout = QHBoxLayout()
 
-        if not any(get_data_path().iterdir()):  # Create blank subject if there is none
-            self.save_subject("General")
-
         self.subject_dropdown = SubjectDropdown()
         self.subject_dropdown.load_subjects_in_dropdown()
 
+        # Create blank subject if there is none, the data folder may hold caches
+        if not get_all_subjects():
+            self.save_subject("General")
+
         self.add_subject_button = QPushButton("Add subject")
         self.add_subject_button.clicked.connect(self.add_subject_form)
 
@@ -64,18 +77,10 @@ class StudyPage(QWidget):
 
     def save_subject(self, subject_name: str) -> None:
         """Adds new .parquet file to data folder."""
-        path = get_data_path() / DATA_FILE.format(subject_name=subject_name)
-
-        if not path.exists():
-            # Create empty DataFrame
-            df = polars.DataFrame(schema=study_time_schema)
-
-            # Save DataFrame
-            df.write_parquet(path)
-
+        if create_subject(subject_name):
             # Reload dropdown
             self.subject_dropdown.load_subjects_in_dropdown(subject_name)
-            self.window().page_statistics.update_subject_list()
+            get_event_bus().subjects_changed.emit()
 
     def add_subject_form(self, event) -> None:
         """Opens form to add subject."""
@@ -105,55 +110,83 @@ class StudyPage(QWidget):
             if subject_name:
                 self.save_subject(subject_name)
 
-    def save_data(self, datetime: datetime.datetime, seconds: int) -> None:
-        """Saves study data into parquet file."""
-        path = get_data_path() / DATA_FILE.format(
-            subject_name=self.subject_dropdown.get_current_subject()
+    def record_session(self) -> None:
+        """Writes new seconds of the session to its recovery file."""
+        self.last_recovery_time = self.stop_time
+        rows = self.session.take_unrecorded()
+        if rows:
+            get_data_service().submit(
+                None, append_recovery, self.session.subject, rows, self.session.batch
+            )
+
+    def save_session(self) -> None:
+        """Writes the seconds of the session to the journal in the background."""
+        self.last_flush_time = self.last_recovery_time = self.stop_time
+        subject = self.session.subject
+        batch = self.session.batch
+        rows = self.session.take_unflushed()
+        self.saving_rows.append((subject, rows))
+        self.submit_save(subject, rows, batch)
+
+    def submit_save(
+        self, subject: str, rows: dict[datetime.datetime, int], batch: str
+    ) -> None:
+        """Writes a batch of seconds to the journal, retrying until it worked."""
+        get_data_service().submit(
+            None,
+            flush_session,
+            subject,
+            rows,
+            batch,
+            callback=lambda _: self.on_data_saved(subject, rows),
+            error_callback=lambda: self.on_save_failed(subject, rows, batch),
         )
 
-        # Open DataFrame
-        df = polars.read_parquet(path)
-
-        # Filter relevant row
-        existing_row = df.filter(polars.col("timestamp") == datetime)
-
-        # Collect second data if row exists
-        if existing_row.height > 0:
-            seconds = existing_row["studied_seconds"][0] + float(seconds)
-
-        # Filter out the row that already exists
-        df = df.filter(polars.col("timestamp") != datetime)
-
-        # Create new row
-        new_row = polars.DataFrame(
-            data=[[datetime, seconds]], schema=study_time_schema, orient="row"
+    def on_save_failed(
+        self, subject: str, rows: dict[datetime.datetime, int], batch: str
+    ) -> None:
+        """Retries a failed save later, its seconds stay in the recovery file."""
+        QTimer.singleShot(
+            SESSION_RECOVERY_INTERVAL * 1000,
+            lambda: self.submit_save(subject, rows, batch),
         )
 
-        # Save data
-        df = polars.concat([df, new_row])
-        df = df.sort("timestamp")
-
-        # Write to file
-        df.write_parquet(path)
+    def on_data_saved(self, subject: str, rows: dict[datetime.datetime, int]) -> None:
+        """Tells the other pages which hours changed after a save."""
+        # Merge journal once the session is over
+        if not self.is_timing:
+            compact_subject_in_background(subject)
+
+        # Saved rows move from the live session to the stored data at once
+        self.saving_rows.remove((subject, rows))
+        get_event_bus().study_time_changed.emit(subject, rows)
+        self.publish_progress()
+
+    def publish_progress(self) -> None:
+        """Tells the other pages about session time that is not saved yet."""
+        rows = self.session.get_unflushed()
+        for subject, saving_rows in self.saving_rows:
+            # Saves of an earlier session may still be retried
+            if subject != self.session.subject:
+                continue
+            for hour, seconds in saving_rows.items():
+                rows[hour] = rows.get(hour, 0) + seconds
+        get_event_bus().session_progress.emit(self.session.subject, rows)
 
     def timer_update(self, save: bool = False) -> None:
-        """Calculate amount time passed up to now."""
+        """Adds the time passed up to now to the session."""
         self.stop_time = datetime.datetime.now()
-        seconds = (self.stop_time - self.start_time).total_seconds()
-
-        # Save every minute is crossed
-        if self.stop_time.second == 0 or save:
-            save_date = self.stop_time - datetime.timedelta(minutes=1)
-            save_date = save_date.replace(minute=0, second=0, microsecond=0)
-            self.save_data(save_date, int(seconds))
+        self.session.add_time(self.stop_time)
 
-            # Reset second counter
-            self.start_time = datetime.datetime.now()
-            self.stop_stop = datetime.datetime.now()
+        # Flush in batches, keeping the last seconds in the recovery file
+        since_flush = (self.stop_time - self.last_flush_time).total_seconds()
+        since_recovery = (self.stop_time - self.last_recovery_time).total_seconds()
+        if save or since_flush >= SESSION_FLUSH_INTERVAL:
+            self.save_session()
+        elif since_recovery >= SESSION_RECOVERY_INTERVAL:
+            self.record_session()
 
-            # Update data on statistics statistics page
-            self.window().page_statistics.update_plots()
-            self.window().page_home.update_plots()
+        self.publish_progress()
 
     def timer_button_event(self, event) -> None:
         """Start/stop timer and change text of button."""
@@ -168,8 +201,15 @@ class StudyPage(QWidget):
             self.add_subject_button.setEnabled(True)
 
         else:  # Start timer
+            # Time of a session without subject could never be read back
+            if not self.subject_dropdown.get_current_subject():
+                return
             self.__timer.start(1000)  # Every second
             self.start_time = datetime.datetime.now()
+            self.session = StudySession(
+                self.subject_dropdown.get_current_subject(), self.start_time
+            )
+            self.last_flush_time = self.last_recovery_time = self.start_time
             self.timer_button.setText("Stop")
             self.is_timing = True
             self.clock.set_start_time(self.start_time)
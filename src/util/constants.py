@@ -2,4 +2,68 @@ from typing import Literal
 
 DATA_DIR: Literal["data/"] = "data/"
 
+CACHE_DIR: Literal["cache/"] = "cache/"
+
+STORE_DIR: Literal["store/"] = "store/"
+
+MIGRATED_DIR: Literal["migrated/"] = "migrated/"
+
+ARROW_DIR: Literal["arrow/"] = "arrow/"
+
 DATA_FILE: Literal["{subject_name}.parquet"] = "{subject_name}.parquet"
+
+JOURNAL_FILE: Literal["{subject_name}.journal"] = "{subject_name}.journal"
+
+COMPACTING_JOURNAL_FILE: Literal["{subject_name}.journal.compacting"] = (
+    "{subject_name}.journal.compacting"
+)
+
+COMMIT_FILE: Literal["{subject_name}.commit"] = "{subject_name}.commit"
+
+STORE_PARTITION_FILE: Literal["year={year}/data.parquet"] = "year={year}/data.parquet"
+
+STORE_SUBJECTS_FILE: Literal["subjects.json"] = "subjects.json"
+
+STORE_VERSION_FILE: Literal["version"] = "version"
+
+# Rows per parquet row group, small enough to skip groups outside a window
+PARQUET_ROW_GROUP_SIZE = 2048
+
+# Journal size in bytes after which it is merged into the parquet file
+JOURNAL_COMPACTION_BYTES = 64 * 1024
+
+RECOVERY_FILE: Literal["{subject_name}.recovery"] = "{subject_name}.recovery"
+
+ROLLUP_FILE: Literal["{subject_name}.{interval}.parquet"] = (
+    "{subject_name}.{interval}.parquet"
+)
+
+ARROW_FILE: Literal["{file_name}.{version}.arrow"] = "{file_name}.{version}.arrow"
+
+SERIES_FILE: Literal["{subject_name}.{version}.hours.npy"] = (
+    "{subject_name}.{version}.hours.npy"
+)
+
+SERIES_PREFIX_FILE: Literal["{subject_name}.{version}.prefix.npy"] = (
+    "{subject_name}.{version}.prefix.npy"
+)
+
+SERIES_INFO_FILE: Literal["{subject_name}.hours.json"] = "{subject_name}.hours.json"
+
+# Intervals of the pre-summed rollups kept next to the hourly data
+ROLLUP_INTERVALS = ("1d", "1mo")
+
+# Interval of the data each zoom level of the statistics page reads
+ZOOM_LEVEL_INTERVALS = {"Day": "1h", "Week": "1d", "Month": "1d", "Year": "1mo"}
+
+# Seconds between flushes of a running session to the journal
+SESSION_FLUSH_INTERVAL = 5 * 60
+
+# Seconds between writes of a running session to its recovery file
+SESSION_RECOVERY_INTERVAL = 5
+
+# Environment variable that turns on recording of timing spans, e.g. =1
+PROFILING_ENV_VAR: Literal["STUDY_TRACKER_PROFILE"] = "STUDY_TRACKER_PROFILE"
+
+# Number of most recent timing spans kept in memory
+PROFILING_BUFFER_SIZE = 10000
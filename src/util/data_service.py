@@ -0,0 +1,146 @@
+import traceback
+from collections.abc import Callable
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+# Shared service, created on first use from the GUI thread
+_data_service = None
+
+
+class _Request(QRunnable):
+    def __init__(self, service: "DataService", request_id: int, function, args):
+        super().__init__()
+        self.service = service
+        self.request_id = request_id
+        self.function = function
+        self.args = args
+
+    def run(self) -> None:
+        """Runs the function on a worker thread and reports back to the service."""
+        try:
+            result = self.function(*self.args)
+        except Exception:
+            traceback.print_exc()
+            self.service.finished.emit(self.request_id, True, None)
+            return
+        self.service.finished.emit(self.request_id, False, result)
+
+
+class DataService(QObject):
+    """Runs data reads, writes and aggregation off the GUI thread."""
+
+    # Request id, whether it failed and the result
+    finished = Signal(int, bool, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.__pool = QThreadPool(self)
+        self.__pool.setMaxThreadCount(2)
+
+        # Writes run one at a time in the order they were submitted
+        self.__write_pool = QThreadPool(self)
+        self.__write_pool.setMaxThreadCount(1)
+
+        self.__request_id = 0
+        self.__requests: dict[
+            int, tuple[_Request, str | None, Callable | None, Callable | None]
+        ] = {}
+        self.__latest: dict[str, int] = {}
+
+        # Reads queued until release_reads(), None while reads run at once
+        self.__held: list[_Request] | None = None
+
+        # Emitted from worker threads, delivered on the GUI thread
+        self.finished.connect(self.__on_finished)
+
+    def submit(
+        self,
+        key: str | None,
+        function: Callable,
+        *args,
+        callback: Callable | None = None,
+        error_callback: Callable | None = None,
+    ) -> int:
+        """Runs function(*args) in the background, passing the result to callback.
+
+        If function raises, error_callback is called without arguments instead.
+
+        Requests without a key, such as writes, are never cancelled and run in
+        the order they were submitted.
+        """
+        self.__request_id += 1
+        request_id = self.__request_id
+
+        if key is not None:
+            self.cancel(key)
+            self.__latest[key] = request_id
+
+        request = _Request(self, request_id, function, args)
+        request.setAutoDelete(False)
+        self.__requests[request_id] = (request, key, callback, error_callback)
+        if key is None:
+            self.__write_pool.start(request)
+        elif self.__held is not None:
+            self.__held.append(request)
+        else:
+            self.__pool.start(request)
+
+        return request_id
+
+    def cancel(self, key: str) -> None:
+        """Drops the latest request with key, its callbacks are never called.
+
+        The request is removed from the queue if it has not started yet.
+        """
+        request_id = self.__latest.pop(key, None)
+        if request_id in self.__requests:
+            request = self.__requests[request_id][0]
+            if self.__held is not None and request in self.__held:
+                self.__held.remove(request)
+                del self.__requests[request_id]
+            elif self.__pool.tryTake(request):
+                del self.__requests[request_id]
+
+    def hold_reads(self) -> None:
+        """Queues requests with a key instead of running them, e.g. during recovery.
+
+        Writes still run, release_reads() starts the queued reads.
+        """
+        if self.__held is None:
+            self.__held = []
+
+    def release_reads(self) -> None:
+        """Starts the reads queued since hold_reads() and runs new ones at once."""
+        held, self.__held = self.__held or [], None
+        for request in held:
+            self.__pool.start(request)
+
+    def wait_for_done(self) -> None:
+        """Blocks until all submitted requests are finished."""
+        self.__write_pool.waitForDone()
+        self.__pool.waitForDone()
+
+    def __on_finished(self, request_id: int, failed: bool, result) -> None:
+        """Passes the result to the callback unless the request became stale."""
+        request = self.__requests.pop(request_id, None)
+        if request is None:
+            return
+
+        _, key, callback, error_callback = request
+        if key is not None and self.__latest.get(key) != request_id:
+            return
+
+        if failed:
+            if error_callback is not None:
+                error_callback()
+        elif callback is not None:
+            callback(result)
+
+
+def get_data_service() -> DataService:
+    """Returns the shared data service."""
+    global _data_service
+    if _data_service is None:
+        _data_service = DataService()
+    return _data_service
@@ -0,0 +1,25 @@
+from PySide6.QtCore import QObject, Signal
+
+# Shared bus, created on first use from the GUI thread
+_event_bus = None
+
+
+class EventBus(QObject):
+    """Tells pages which study data changed, so only affected pages reload."""
+
+    # Subject and the added seconds per hour, None if the changes are unknown
+    study_time_changed = Signal(str, object)
+
+    # Subject and the seconds per hour of the running session not saved yet
+    session_progress = Signal(str, object)
+
+    # A subject was added
+    subjects_changed = Signal()
+
+
+def get_event_bus() -> EventBus:
+    """Returns the shared event bus."""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = EventBus()
+    return _event_bus
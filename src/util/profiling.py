@@ -0,0 +1,118 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from util.constants import PROFILING_BUFFER_SIZE, PROFILING_ENV_VAR
+
+# Decided once at startup, disabled spans cost nothing after import
+ENABLED = os.getenv(PROFILING_ENV_VAR, "") not in ("", "0")
+
+# Recent spans as (name, category, thread id, start in µs, duration in µs)
+_spans: deque[tuple[str, str, int, float, float]] = deque(maxlen=PROFILING_BUFFER_SIZE)
+
+# Shared start of the timeline, so spans of all threads line up
+_origin = time.perf_counter()
+
+
+@contextlib.contextmanager
+def _record(name: str, category: str):
+    """Records the time spent in the with block as a span."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        _spans.append(
+            (
+                name,
+                category,
+                threading.get_ident(),
+                (start - _origin) * 1e6,
+                (end - start) * 1e6,
+            )
+        )
+
+
+def span(name: str, category: str):
+    """Returns a context manager recording a span, or doing nothing if disabled."""
+    if not ENABLED:
+        return contextlib.nullcontext()
+    return _record(name, category)
+
+
+def traced(category: str):
+    """Decorator recording each call of a function as a span.
+
+    Returns the function itself when profiling is disabled.
+    """
+
+    def decorator(function):
+        if not ENABLED:
+            return function
+
+        name = function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with _record(name, category):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def get_spans() -> list[tuple[str, str, int, float, float]]:
+    """Returns the recorded spans, oldest first."""
+    return list(_spans)
+
+
+def get_span_stats() -> list[dict]:
+    """Returns count, total, mean and maximum duration in ms per span name."""
+    durations: dict[tuple[str, str], list[float]] = {}
+    for name, category, _, _, duration in get_spans():
+        durations.setdefault((name, category), []).append(duration / 1000)
+
+    return sorted(
+        (
+            {
+                "name": name,
+                "category": category,
+                "count": len(times),
+                "total_ms": sum(times),
+                "mean_ms": sum(times) / len(times),
+                "max_ms": max(times),
+            }
+            for (name, category), times in durations.items()
+        ),
+        key=lambda stats: stats["total_ms"],
+        reverse=True,
+    )
+
+
+def clear_spans() -> None:
+    """Removes all recorded spans."""
+    _spans.clear()
+
+
+def dump_trace(path: str) -> None:
+    """Writes the recorded spans as a Chrome trace, e.g. for chrome://tracing."""
+    pid = os.getpid()
+    events = [
+        {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start,
+            "dur": duration,
+            "pid": pid,
+            "tid": tid,
+        }
+        for name, category, tid, start, duration in get_spans()
+    ]
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
@@ -4,3 +4,8 @@ study_time_schema = {
     "timestamp": polars.Datetime("us"),
     "studied_seconds": polars.Int32,
 }
+
+store_schema = {
+    "subject": polars.Categorical,
+    **study_time_schema,
+}
@@ -0,0 +1,105 @@
+import datetime
+
+import numpy
+
+# Hours are counted from here, timestamps are naive like the stored data
+EPOCH = datetime.datetime(1970, 1, 1)
+
+HOUR = datetime.timedelta(hours=1)
+
+
+def to_epoch_hour(timestamp: datetime.datetime) -> int:
+    """Returns the number of whole hours between the epoch and timestamp."""
+    return (timestamp - EPOCH) // HOUR
+
+
+def from_epoch_hour(hour: int) -> datetime.datetime:
+    """Returns the timestamp at the start of an epoch hour."""
+    return EPOCH + hour * HOUR
+
+
+def to_dense(hours: numpy.ndarray, seconds: numpy.ndarray) -> tuple[int, numpy.ndarray]:
+    """Returns the first epoch hour and the seconds of every hour from there on."""
+    if len(hours) == 0:
+        return 0, numpy.zeros(0, dtype=numpy.int32)
+
+    start_hour = int(hours.min())
+    dense = numpy.zeros(int(hours.max()) - start_hour + 1, dtype=numpy.int32)
+    numpy.add.at(dense, hours - start_hour, seconds)
+    return start_hour, dense
+
+
+def get_prefix_sums(seconds: numpy.ndarray) -> numpy.ndarray:
+    """Returns the sums of the first 0, 1, ..., len(seconds) values."""
+    prefix = numpy.zeros(len(seconds) + 1, dtype=numpy.int64)
+    numpy.cumsum(seconds, dtype=numpy.int64, out=prefix[1:])
+    return prefix
+
+
+class HourlySeries:
+    """Studied seconds of a subject for every hour as one dense array.
+
+    The array may be memory-mapped from disk. Rows that are not part of the
+    array yet, such as the journal, are kept in a small overlay.
+    """
+
+    def __init__(
+        self,
+        start_hour: int,
+        seconds: numpy.ndarray,
+        overlay: dict[int, int] | None = None,
+        prefix: numpy.ndarray | None = None,
+    ):
+        self.start_hour = start_hour
+        self.seconds = seconds
+        self.overlay = overlay or {}
+
+        # prefix[i] is the sum of the first i hours, for totals of any range
+        self.prefix = prefix if prefix is not None else get_prefix_sums(seconds)
+
+        self.__overlay_hours = numpy.array(sorted(self.overlay), dtype=numpy.int64)
+        self.__overlay_seconds = numpy.array(
+            [self.overlay[hour] for hour in sorted(self.overlay)], dtype=numpy.int64
+        )
+
+    def __len__(self) -> int:
+        return len(self.seconds)
+
+    def get_sums(self, boundaries: list[datetime.datetime]) -> numpy.ndarray:
+        """Returns total seconds between each pair of consecutive boundaries."""
+        hours = numpy.array(
+            [to_epoch_hour(boundary) for boundary in boundaries], dtype=numpy.int64
+        )
+        if len(hours) < 2:
+            return numpy.zeros(0, dtype=numpy.int64)
+
+        # Each sum is the difference of two prefix sums
+        indexes = numpy.clip(hours - self.start_hour, 0, len(self))
+        sums = self.prefix[indexes[1:]] - self.prefix[indexes[:-1]]
+
+        if len(self.__overlay_hours):
+            buckets = numpy.searchsorted(hours, self.__overlay_hours, side="right") - 1
+            inside = (buckets >= 0) & (self.__overlay_hours < hours[-1])
+            numpy.add.at(sums, buckets[inside], self.__overlay_seconds[inside])
+
+        return sums
+
+    def get_total(
+        self,
+        timestamp_start: datetime.datetime | None = None,
+        timestamp_end: datetime.datetime | None = None,
+    ) -> int:
+        """Returns total seconds in the window, or of all hours without bounds."""
+        # Without bounds the window spans the array and the overlay
+        if timestamp_start is not None:
+            start = to_epoch_hour(timestamp_start)
+        else:
+            start = min([self.start_hour, *self.overlay])
+        if timestamp_end is not None:
+            end = to_epoch_hour(timestamp_end)
+        else:
+            end = max(
+                [self.start_hour + len(self), *(hour + 1 for hour in self.overlay)]
+            )
+
+        return int(self.get_sums([from_epoch_hour(start), from_epoch_hour(end)])[0])
@@ -0,0 +1,56 @@
+import datetime
+import uuid
+
+
+class StudySession:
+    """Accumulates the studied seconds of a running session per hour in memory."""
+
+    def __init__(self, subject: str, start_time: datetime.datetime):
+        self.subject = subject
+
+        # Flushed batches are tagged with id and sequence, so a recovery can
+        # tell which of them already made it into the journal
+        self.id = uuid.uuid4().hex
+        self.__sequence = 0
+
+        # Whole seconds only, so no fractions get lost between updates
+        self.__counted_until = start_time.replace(microsecond=0)
+
+        # Seconds per hour not yet in the journal and not yet in the recovery file
+        self.__unflushed: dict[datetime.datetime, int] = {}
+        self.__unrecorded: dict[datetime.datetime, int] = {}
+
+    def add_time(self, now: datetime.datetime) -> None:
+        """Adds the seconds passed since the last call to their hours."""
+        now = now.replace(microsecond=0)
+
+        # Split the time at the hour boundaries it crosses
+        while self.__counted_until < now:
+            hour = self.__counted_until.replace(minute=0, second=0)
+            until = min(now, hour + datetime.timedelta(hours=1))
+            seconds = int((until - self.__counted_until).total_seconds())
+
+            self.__unflushed[hour] = self.__unflushed.get(hour, 0) + seconds
+            self.__unrecorded[hour] = self.__unrecorded.get(hour, 0) + seconds
+            self.__counted_until = until
+
+    @property
+    def batch(self) -> str:
+        """Returns the tag of the seconds that will be flushed next."""
+        return f"{self.id}-{self.__sequence}"
+
+    def get_unflushed(self) -> dict[datetime.datetime, int]:
+        """Returns the seconds not yet written to the journal."""
+        return dict(self.__unflushed)
+
+    def take_unrecorded(self) -> dict[datetime.datetime, int]:
+        """Returns and clears the seconds not yet written to the recovery file."""
+        rows, self.__unrecorded = self.__unrecorded, {}
+        return rows
+
+    def take_unflushed(self) -> dict[datetime.datetime, int]:
+        """Returns and clears the seconds not yet written to the journal."""
+        rows, self.__unflushed = self.__unflushed, {}
+        self.__unrecorded = {}
+        self.__sequence += 1
+        return rows
@@ -0,0 +1,1089 @@
+import datetime
+import io
+import json
+import os
+import pathlib
+import shutil
+import sys
+import threading
+
+import numpy
+import polars
+from util.constants import (
+    ARROW_DIR,
+    ARROW_FILE,
+    CACHE_DIR,
+    COMMIT_FILE,
+    COMPACTING_JOURNAL_FILE,
+    DATA_DIR,
+    DATA_FILE,
+    JOURNAL_COMPACTION_BYTES,
+    JOURNAL_FILE,
+    MIGRATED_DIR,
+    PARQUET_ROW_GROUP_SIZE,
+    RECOVERY_FILE,
+    ROLLUP_FILE,
+    ROLLUP_INTERVALS,
+    SERIES_FILE,
+    SERIES_INFO_FILE,
+    SERIES_PREFIX_FILE,
+    STORE_DIR,
+    STORE_PARTITION_FILE,
+    STORE_SUBJECTS_FILE,
+    STORE_VERSION_FILE,
+)
+from util.profiling import traced
+from util.schemas import store_schema, study_time_schema
+from util.series import HourlySeries, get_prefix_sums, to_dense, to_epoch_hour
+
+# Guards the swap of compacted files against concurrent reads and appends
+_lock = threading.RLock()
+
+# Serializes compactions, which may rewrite the same partition of the store
+_compaction_lock = threading.Lock()
+
+# Subjects that currently have a compaction running in the background
+_compacting: set[str] = set()
+
+# Serializes rebuilds of the series files, which may be read by two threads
+_series_lock = threading.Lock()
+
+# Hourly series per subject with the file state they were read at
+_series: dict[str, tuple[list[int], HourlySeries]] = {}
+
+# Reads of series served from memory and reads that had to load from disk
+_series_stats = {"hits": 0, "misses": 0}
+
+
+def get_data_path() -> pathlib.Path:
+    base_data_dir: pathlib.Path
+    if sys.platform == "win32":
+        appdata_dir = os.getenv("LOCALAPPDATA") or os.getenv("APPDATA")
+        base_data_dir = pathlib.Path(appdata_dir) / "StudyTracker" / DATA_DIR
+    else:
+        base_data_dir = (
+            pathlib.Path.home() / ".local" / "share" / "StudyTracker" / DATA_DIR
+        )
+
+    # Ensure directory exists
+    base_data_dir.mkdir(parents=True, exist_ok=True)
+
+    return base_data_dir
+
+
+def get_cache_path() -> pathlib.Path:
+    """Returns directory of derived data that can be rebuilt from subject files."""
+    cache_dir = get_data_path() / CACHE_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def get_store_path() -> pathlib.Path:
+    """Returns directory of the consolidated store of all subjects."""
+    return get_data_path() / STORE_DIR
+
+
+def is_consolidated() -> bool:
+    """Checks if the data has been migrated to the consolidated store."""
+    return get_store_path().exists()
+
+
+def get_subject_path(subject: str) -> pathlib.Path:
+    """Returns path of the compacted parquet file of a subject."""
+    return get_data_path() / DATA_FILE.format(subject_name=subject)
+
+
+def get_journal_path(subject: str) -> pathlib.Path:
+    """Returns path of the append-only journal of a subject."""
+    return get_data_path() / JOURNAL_FILE.format(subject_name=subject)
+
+
+def get_compacting_journal_path(subject: str) -> pathlib.Path:
+    """Returns path of the journal of a subject that is being compacted."""
+    return get_data_path() / COMPACTING_JOURNAL_FILE.format(subject_name=subject)
+
+
+def get_commit_path(subject: str) -> pathlib.Path:
+    """Returns path of the record of a compaction that is being committed."""
+    return get_data_path() / COMMIT_FILE.format(subject_name=subject)
+
+
+def get_recovery_path(subject: str) -> pathlib.Path:
+    """Returns path of the recovery file of a running session of a subject."""
+    return get_data_path() / RECOVERY_FILE.format(subject_name=subject)
+
+
+def get_partition_path(year: int) -> pathlib.Path:
+    """Returns path of the partition of the consolidated store for a year."""
+    return get_store_path() / STORE_PARTITION_FILE.format(year=year)
+
+
+def get_compacted_path(subject: str) -> pathlib.Path:
+    """Returns path of the file that changes whenever a subject is compacted."""
+    if is_consolidated():
+        return get_store_path() / STORE_VERSION_FILE
+    return get_subject_path(subject)
+
+
+def get_rollup_path(subject: str, interval: str) -> pathlib.Path:
+    """Returns path of the rollup of a subject summed per interval."""
+    return get_cache_path() / ROLLUP_FILE.format(
+        subject_name=subject, interval=interval
+    )
+
+
+def get_arrow_path(path: pathlib.Path, version: str) -> pathlib.Path:
+    """Returns path of the Arrow copy of a version of a parquet file."""
+    relative_path = path.relative_to(get_data_path())
+    return (
+        get_cache_path()
+        / ARROW_DIR
+        / relative_path.parent
+        / ARROW_FILE.format(file_name=path.name, version=version)
+    )
+
+
+def get_series_path(subject: str, version: int) -> pathlib.Path:
+    """Returns path of a version of the hourly series file of a subject."""
+    return get_cache_path() / SERIES_FILE.format(subject_name=subject, version=version)
+
+
+def get_series_prefix_path(subject: str, version: int) -> pathlib.Path:
+    """Returns path of the prefix sums of a version of the series of a subject."""
+    return get_cache_path() / SERIES_PREFIX_FILE.format(
+        subject_name=subject, version=version
+    )
+
+
+def get_series_info_path(subject: str) -> pathlib.Path:
+    """Returns path of the file describing the current series file of a subject."""
+    return get_cache_path() / SERIES_INFO_FILE.format(subject_name=subject)
+
+
+def get_all_subjects() -> list[str]:
+    if is_consolidated():
+        return json.loads((get_store_path() / STORE_SUBJECTS_FILE).read_text())
+
+    path = get_data_path()
+    subjects = [p.stem for p in path.glob("*.parquet")]
+    return subjects
+
+
+def get_file_state(subject: str) -> list[int]:
+    """Returns modification time and size of the compacted data and journals."""
+    state = []
+    for path in (
+        get_compacted_path(subject),
+        get_compacting_journal_path(subject),
+        get_journal_path(subject),
+    ):
+        try:
+            stat = path.stat()
+            state += [stat.st_mtime_ns, stat.st_size]
+        except FileNotFoundError:
+            state += [0, 0]
+    return state
+
+
+def create_subject(subject: str) -> bool:
+    """Creates an empty subject, returns False if it already exists."""
+    if is_consolidated():
+        with _lock:
+            subjects = get_all_subjects()
+            if subject in subjects:
+                return False
+            _write_json(get_store_path() / STORE_SUBJECTS_FILE, subjects + [subject])
+            return True
+
+    path = get_subject_path(subject)
+
+    if path.exists():
+        return False
+
+    replace_data(polars.DataFrame(schema=study_time_schema), path)
+    return True
+
+
+@traced("write")
+def write_data(df: polars.DataFrame, path: pathlib.Path) -> None:
+    """Writes study data sorted by timestamp with row group statistics."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.sort("timestamp").write_parquet(
+        path, statistics=True, row_group_size=PARQUET_ROW_GROUP_SIZE
+    )
+    _fsync(path)
+
+
+def replace_data(df: polars.DataFrame, path: pathlib.Path) -> None:
+    """Writes study data to a temporary file and moves it over path at once.
+
+    Readers see either the old or the new file, never a partly written one.
+    """
+    temp_path = _get_temp_path(path)
+    write_data(df, temp_path)
+    os.replace(temp_path, path)
+    _fsync_dir(path.parent)
+    _remove_arrow_copies(path)
+
+
+def filter_window(
+    lf: polars.LazyFrame,
+    timestamp_start: datetime.datetime | None,
+    timestamp_end: datetime.datetime | None,
+) -> polars.LazyFrame:
+    """Filters rows to timestamps within [timestamp_start, timestamp_end)."""
+    if timestamp_start is not None:
+        lf = lf.filter(polars.col("timestamp") >= timestamp_start)
+    if timestamp_end is not None:
+        lf = lf.filter(polars.col("timestamp") < timestamp_end)
+    return lf
+
+
+@traced("read")
+def scan_data(
+    path: pathlib.Path,
+    timestamp_start: datetime.datetime | None = None,
+    timestamp_end: datetime.datetime | None = None,
+) -> polars.DataFrame:
+    """Reads study data within a window from the Arrow copy of a parquet file."""
+    lf = _scan_arrow_copy(path)
+    return filter_window(lf, timestamp_start, timestamp_end).collect()
+
+
+def _get_parquet_version(path: pathlib.Path) -> str:
+    """Returns a version of a parquet file that changes whenever it is replaced."""
+    stat = path.stat()
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _scan_arrow_copy(path: pathlib.Path) -> polars.LazyFrame:
+    """Scans an uncompressed Arrow copy of a parquet file, written on first use.
+
+    The copy is memory-mapped, so reads skip decoding and decompressing the
+    parquet. Its name contains the version of the parquet file, so a copy of
+    an older version is never read.
+    """
+    version = _get_parquet_version(path)
+    arrow_path = get_arrow_path(path, version)
+
+    if not arrow_path.exists():
+        df = polars.read_parquet(path)
+
+        # A file replaced while it was read may not match the version
+        if _get_parquet_version(path) != version:
+            return df.lazy()
+
+        arrow_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = _get_temp_path(arrow_path)
+        df.write_ipc(temp_path, compression="uncompressed")
+        os.replace(temp_path, arrow_path)
+        _remove_arrow_copies(path, keep=arrow_path)
+
+    return polars.scan_ipc(arrow_path, memory_map=True)
+
+
+def _remove_arrow_copies(path: pathlib.Path, keep: pathlib.Path | None = None) -> None:
+    """Removes Arrow copies of a parquet file, e.g. after it was replaced."""
+    suffix = ARROW_FILE.rpartition("}")[2]
+    for arrow_path in get_arrow_path(path, "").parent.glob(f"*{suffix}"):
+        file_name = arrow_path.name.removesuffix(suffix).rpartition(".")[0]
+        if file_name == path.name and arrow_path != keep:
+            # Copies still mapped on Windows are removed on a later write
+            try:
+                arrow_path.unlink()
+            except OSError:
+                pass
+
+
+@traced("read")
+def scan_store(
+    subjects: list[str] | None = None,
+    timestamp_start: datetime.datetime | None = None,
+    timestamp_end: datetime.datetime | None = None,
+) -> polars.DataFrame:
+    """Reads rows of the consolidated store within a window in a single scan."""
+    partitions = get_store_path() / STORE_PARTITION_FILE.format(year="*")
+
+    if not any(get_store_path().glob(STORE_PARTITION_FILE.format(year="*"))):
+        return polars.DataFrame(schema={**store_schema, "subject": polars.String})
+
+    with polars.StringCache():
+        lf = polars.scan_parquet(partitions, hive_partitioning=True)
+
+        # Skip partitions of years outside of the window
+        if timestamp_start is not None:
+            lf = lf.filter(polars.col("year") >= timestamp_start.year)
+        if timestamp_end is not None:
+            lf = lf.filter(polars.col("year") <= timestamp_end.year)
+
+        lf = filter_window(lf, timestamp_start, timestamp_end).with_columns(
+            polars.col("subject").cast(polars.String)
+        )
+        if subjects is not None:
+            lf = lf.filter(polars.col("subject").is_in(subjects))
+
+        return lf.select(list(store_schema)).collect()
+
+
+def read_compacted(
+    subject: str,
+    timestamp_start: datetime.datetime | None = None,
+    timestamp_end: datetime.datetime | None = None,
+) -> polars.DataFrame:
+    """Reads compacted study data of a subject, without the journal."""
+    if is_consolidated():
+        return scan_store([subject], timestamp_start, timestamp_end).drop("subject")
+    return scan_data(get_subject_path(subject), timestamp_start, timestamp_end)
+
+
+def read_journal(subject: str) -> polars.DataFrame:
+    """Reads the journals of a subject, including one being compacted."""
+    return polars.concat(
+        [
+            _read_journal_file(get_compacting_journal_path(subject)),
+            _read_journal_file(get_journal_path(subject)),
+        ]
+    )
+
+
+@traced("read")
+def _read_journal_file(path: pathlib.Path) -> polars.DataFrame:
+    """Reads the complete lines of a journal file."""
+    if not path.exists():
+        return polars.DataFrame(schema=study_time_schema)
+
+    # A crash during an append may leave an incomplete last line
+    content = path.read_bytes()
+    content = content[: content.rfind(b"\n") + 1]
+
+    if not content:
+        return polars.DataFrame(schema=study_time_schema)
+
+    # Rows of sessions have their batch as third field, which is dropped
+    return polars.read_csv(
+        io.BytesIO(content),
+        has_header=False,
+        new_columns=list(study_time_schema),
+        schema=study_time_schema,
+        truncate_ragged_lines=True,
+    )
+
+
+def merge_rows(df: polars.DataFrame) -> polars.DataFrame:
+    """Sums rows sharing a timestamp and sorts by timestamp."""
+    return (
+        df.group_by("timestamp")
+        .agg(polars.col("studied_seconds").sum())
+        .cast(study_time_schema)
+        .sort("timestamp")
+    )
+
+
+def build_rollup(df: polars.DataFrame, interval: str) -> polars.DataFrame:
+    """Sums hourly rows into rows per interval, e.g. "1d" or "1mo"."""
+    return merge_rows(df.with_columns(polars.col("timestamp").dt.truncate(interval)))
+
+
+def write_rollups(subject: str, rollups: dict[str, polars.DataFrame]) -> None:
+    """Writes rollups of a subject, must be called after the parquet is written."""
+    for interval, rollup in rollups.items():
+        replace_data(rollup, get_rollup_path(subject, interval))
+
+
+@traced("read")
+def read_subject(
+    subject: str,
+    timestamp_start: datetime.datetime | None = None,
+    timestamp_end: datetime.datetime | None = None,
+) -> polars.DataFrame:
+    """Reads study data of a subject, including uncompacted journal rows."""
+    with _lock:
+        df = read_compacted(subject, timestamp_start, timestamp_end)
+        journal = read_journal(subject)
+
+    journal = filter_window(journal.lazy(), timestamp_start, timestamp_end).collect()
+
+    if journal.height == 0:
+        return df
+
+    return merge_rows(polars.concat([df, journal]))
+
+
+@traced("read")
+def read_series(subject: str) -> HourlySeries:
+    """Returns studied seconds per hour of a subject, including the journal.
+
+    Compacted hours and their prefix sums are memory-mapped from cache files,
+    which compaction keeps up to date. They are rebuilt if the compacted data
+    was changed otherwise. Journal rows are added on top in memory.
+    """
+    with _series_lock:
+        with _lock:
+            file_state = get_file_state(subject)
+            cached = _series.get(subject)
+            if cached is not None and cached[0] == file_state:
+                _series_stats["hits"] += 1
+                return cached[1]
+            _series_stats["misses"] += 1
+
+            info = _load_series_info(subject)
+            is_stale = info is None or info["file_state"] != file_state[:2]
+            df = None
+            if is_stale and not is_consolidated():
+                df = read_compacted(subject)
+            journal = read_journal(subject)
+
+        if is_stale:
+            if df is None:
+                # Series of the other subjects are most likely stale as well
+                _rebuild_store_series(subject)
+                info = _load_series_info(subject)
+            else:
+                info = _write_series(subject, df, file_state[:2])
+
+        overlay: dict[int, int] = {}
+        for timestamp, seconds in journal.iter_rows():
+            hour = to_epoch_hour(timestamp)
+            overlay[hour] = overlay.get(hour, 0) + seconds
+
+        version = info["version"]
+        series = HourlySeries(
+            info["start_hour"],
+            numpy.load(get_series_path(subject, version), mmap_mode="r"),
+            overlay,
+            numpy.load(get_series_prefix_path(subject, version), mmap_mode="r"),
+        )
+        _series[subject] = (file_state, series)
+        return series
+
+
+def get_series_cache_stats() -> dict[str, int]:
+    """Returns hit and miss counts and the number of series held in memory."""
+    # Not locked, the debug panel must not wait for a rebuild of a series
+    return {**_series_stats, "subjects": len(_series)}
+
+
+def _load_series_info(subject: str) -> dict | None:
+    """Returns the description of the series file of a subject, if there is one."""
+    try:
+        info = json.loads(get_series_info_path(subject).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    version = info["version"]
+    if not (
+        get_series_path(subject, version).exists()
+        and get_series_prefix_path(subject, version).exists()
+    ):
+        return None
+    return info
+
+
+@traced("write")
+def _write_series(subject: str, df: polars.DataFrame, file_state: list[int]) -> dict:
+    """Writes all compacted rows of a subject as a new series, returns its info.
+
+    Every rebuild gets new files, as a mapped file cannot be replaced on Windows.
+    """
+    hours = df["timestamp"].dt.epoch("s").to_numpy() // 3600
+    start_hour, seconds = to_dense(hours, df["studied_seconds"].to_numpy())
+
+    info = _load_series_info(subject)
+    version = info["version"] + 1 if info is not None else 0
+    for path, array in (
+        (get_series_path(subject, version), seconds),
+        (get_series_prefix_path(subject, version), get_prefix_sums(seconds)),
+    ):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = _get_temp_path(path)
+        with open(temp_path, "wb") as file:
+            numpy.save(file, array)
+        os.replace(temp_path, path)
+
+    info = {"version": version, "start_hour": start_hour, "file_state": file_state}
+    _write_json(get_series_info_path(subject), info)
+
+    # Older versions that are still mapped are removed by a later rebuild
+    for template in (SERIES_FILE, SERIES_PREFIX_FILE):
+        suffix = template.rpartition("}")[2]
+        for old_path in get_cache_path().glob(f"*{suffix}"):
+            name, _, old_version = old_path.name.removesuffix(suffix).rpartition(".")
+            if name == subject and old_version != str(version):
+                try:
+                    old_path.unlink()
+                except OSError:
+                    pass
+
+    return info
+
+
+def _read_store_by_subject(subjects: list[str]) -> dict[str, polars.DataFrame]:
+    """Reads the compacted rows of subjects in a single scan of the store."""
+    df = scan_store(subjects)
+    frames = {
+        subject: rows.drop("subject")
+        for (subject,), rows in df.group_by("subject", maintain_order=True)
+    }
+    empty = polars.DataFrame(schema=study_time_schema)
+    return {subject: frames.get(subject, empty) for subject in subjects}
+
+
+def _rebuild_store_series(subject: str) -> None:
+    """Rebuilds the stale series of all subjects of the store at once.
+
+    Must be called with _series_lock held, subject is rebuilt even if unknown.
+    """
+    subjects = get_all_subjects()
+    if subject not in subjects:
+        subjects.append(subject)
+
+    with _lock:
+        file_state = get_file_state(subject)[:2]
+        stale_subjects = []
+        for name in subjects:
+            info = _load_series_info(name)
+            if info is None or info["file_state"] != file_state:
+                stale_subjects.append(name)
+        frames = _read_store_by_subject(stale_subjects)
+
+    for name, df in frames.items():
+        _write_series(name, df, file_state)
+
+
+def _rebuild_store_rollups(subject: str) -> None:
+    """Rebuilds the stale rollups of all subjects of the store at once."""
+    subjects = get_all_subjects()
+    if subject not in subjects:
+        subjects.append(subject)
+
+    with _lock:
+        stale_subjects = [
+            name
+            for name in subjects
+            if any(_is_rollup_stale(name, i) for i in ROLLUP_INTERVALS)
+        ]
+        for name, df in _read_store_by_subject(stale_subjects).items():
+            write_rollups(name, {i: build_rollup(df, i) for i in ROLLUP_INTERVALS})
+
+
+def _move_series_infos(old_state: list[int], new_state: list[int]) -> None:
+    """Marks series built at one state of the compacted data as valid for another.
+
+    Used after a compaction of the consolidated store, where the shared version
+    file changes but the data of all other subjects stays the same.
+    """
+    suffix = SERIES_INFO_FILE.format(subject_name="")
+    for path in get_cache_path().glob(f"*{suffix}"):
+        try:
+            info = json.loads(path.read_text())
+        except json.JSONDecodeError:
+            continue
+        if info["file_state"] == old_state:
+            info["file_state"] = new_state
+            _write_json(path, info)
+
+
+def read_all_subjects(
+    timestamp_start: datetime.datetime | None = None,
+    timestamp_end: datetime.datetime | None = None,
+) -> polars.DataFrame:
+    """Reads study data of all subjects, with the subject name as a column."""
+    subjects = get_all_subjects()
+    schema = {**store_schema, "subject": polars.String}
+
+    if not is_consolidated():
+        return polars.concat(
+            [polars.DataFrame(schema=schema)]
+            + [
+                read_subject(subject, timestamp_start, timestamp_end).select(
+                    polars.lit(subject).alias("subject"), polars.all()
+                )
+                for subject in subjects
+            ]
+        )
+
+    # One scan over the store instead of one file per subject
+    with _lock:
+        df = scan_store(subjects, timestamp_start, timestamp_end)
+        journals = [
+            read_journal(subject).select(
+                polars.lit(subject).alias("subject"), polars.all()
+            )
+            for subject in subjects
+        ]
+
+    journal = filter_window(
+        polars.concat([polars.DataFrame(schema=schema), *journals]).lazy(),
+        timestamp_start,
+        timestamp_end,
+    ).collect()
+
+    if journal.height == 0:
+        return df.sort("subject", "timestamp")
+
+    return (
+        polars.concat([df, journal])
+        .group_by("subject", "timestamp")
+        .agg(polars.col("studied_seconds").sum())
+        .cast(schema)
+        .sort("subject", "timestamp")
+    )
+
+
+@traced("read")
+def read_rollup(
+    subject: str,
+    interval: str,
+    timestamp_start: datetime.datetime | None = None,
+    timestamp_end: datetime.datetime | None = None,
+) -> polars.DataFrame:
+    """Reads study data of a subject summed per interval, including the journal."""
+    # Rollups of the other subjects are most likely stale as well
+    if is_consolidated() and _is_rollup_stale(subject, interval):
+        _rebuild_store_rollups(subject)
+
+    with _lock:
+        path = get_rollup_path(subject, interval)
+        if _is_rollup_stale(subject, interval):
+            df = read_compacted(subject)
+            write_rollups(subject, {i: build_rollup(df, i) for i in ROLLUP_INTERVALS})
+
+        df = scan_data(path, timestamp_start, timestamp_end)
+        journal = read_journal(subject)
+
+    journal = filter_window(
+        build_rollup(journal, interval).lazy(), timestamp_start, timestamp_end
+    ).collect()
+
+    if journal.height == 0:
+        return df
+
+    return merge_rows(polars.concat([df, journal]))
+
+
+def _is_rollup_stale(subject: str, interval: str) -> bool:
+    """Checks if a rollup is missing or was written before the compacted data."""
+    path = get_rollup_path(subject, interval)
+    compacted_path = get_compacted_path(subject)
+    return not path.exists() or (
+        compacted_path.exists()
+        and path.stat().st_mtime_ns < compacted_path.stat().st_mtime_ns
+    )
+
+
+def append_study_time(subject: str, timestamp: datetime.datetime, seconds: int) -> None:
+    """Appends studied seconds of an hour to the journal of a subject."""
+    append_study_times(subject, {timestamp: seconds})
+
+
+@traced("write")
+def append_study_times(
+    subject: str, rows: dict[datetime.datetime, int], batch: str | None = None
+) -> None:
+    """Appends studied seconds per hour to the journal of a subject at once.
+
+    Rows of a session are tagged with their batch, see recover_sessions().
+    """
+    path = get_journal_path(subject)
+
+    with _lock:
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(_format_rows(rows, batch))
+            file.flush()
+            os.fsync(file.fileno())
+        journal_size = path.stat().st_size
+
+    # Merge journal into parquet once it grows large
+    if journal_size >= JOURNAL_COMPACTION_BYTES:
+        compact_subject_in_background(subject)
+
+
+def append_recovery(
+    subject: str, rows: dict[datetime.datetime, int], batch: str
+) -> None:
+    """Appends unflushed seconds of a running session to its recovery file.
+
+    Batch is the tag the seconds get once they are flushed to the journal.
+    """
+    with open(get_recovery_path(subject), "a", encoding="utf-8") as file:
+        file.write(_format_rows(rows, batch))
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def flush_session(
+    subject: str, rows: dict[datetime.datetime, int], batch: str | None = None
+) -> None:
+    """Appends seconds of a running session to the journal.
+
+    The lines of the batch in the recovery file only hold seconds included in
+    rows, so they are removed. Safe to retry, hours of the batch that are
+    already in the journal are skipped.
+    """
+    with _lock:
+        if batch is not None:
+            flushed = _get_flushed_hours(subject)
+            rows = {
+                timestamp: seconds
+                for timestamp, seconds in rows.items()
+                if (timestamp.isoformat(), batch) not in flushed
+            }
+        if rows:
+            append_study_times(subject, rows, batch)
+        _remove_recovery(subject, batch)
+
+
+def _get_flushed_hours(subject: str) -> set[tuple[str, str]]:
+    """Returns hour and batch of the tagged rows in the journals of a subject."""
+    flushed = set()
+    for path in (get_compacting_journal_path(subject), get_journal_path(subject)):
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                fields = line.split(",")
+                if len(fields) == 3:
+                    flushed.add((fields[0], fields[2]))
+    return flushed
+
+
+def _remove_recovery(subject: str, batch: str | None = None) -> None:
+    """Removes lines of a batch, or all, from the recovery file of a subject."""
+    path = get_recovery_path(subject)
+    if not path.exists():
+        return
+
+    # Lines of other batches belong to saves that are still to come
+    lines = []
+    if batch is not None:
+        content = path.read_text(encoding="utf-8")
+        lines = [
+            line
+            for line in content[: content.rfind("\n") + 1].splitlines()
+            if not line.endswith(f",{batch}")
+        ]
+
+    if lines:
+        _write_text(path, "".join(f"{line}\n" for line in lines))
+    else:
+        path.unlink()
+        _fsync_dir(path.parent)
+
+
+def recover_data() -> list[str]:
+    """Finishes or undoes writes interrupted by a crash and recovers sessions.
+
+    Must run before any other write. Returns the subjects of recovered sessions.
+    """
+    data_path = get_data_path()
+
+    with _compaction_lock, _series_lock, _lock:
+        # Compactions with a commit record are finished
+        for path in data_path.glob(f"*{COMMIT_FILE.format(subject_name='')}"):
+            subject = path.name.removesuffix(COMMIT_FILE.format(subject_name=""))
+            _finish_commit(subject)
+            for interval in ROLLUP_INTERVALS:
+                get_rollup_path(subject, interval).unlink(missing_ok=True)
+
+        # Others are undone, their journal is merged by the next compaction
+        for path in [
+            *data_path.glob("*.tmp"),
+            *get_cache_path().rglob("*.tmp"),
+            *get_store_path().glob("*/*.tmp"),
+        ]:
+            if path.is_file():
+                path.unlink()
+
+        # Drop incomplete last lines so appends start on a new line
+        for path in data_path.glob("*.journal*"):
+            content = path.read_bytes()
+            if content and not content.endswith(b"\n"):
+                with open(path, "rb+") as file:
+                    file.truncate(content.rfind(b"\n") + 1)
+                    os.fsync(file.fileno())
+
+    return recover_sessions()
+
+
+def recover_sessions() -> list[str]:
+    """Moves sessions left in recovery files after a crash into the journals.
+
+    Hours of batches that are already in the journal are skipped, as a crash
+    may come between flushing a batch and removing the recovery file. Must run
+    before any session is started. Returns the recovered subjects.
+    """
+    suffix = RECOVERY_FILE.format(subject_name="")
+    subjects = []
+
+    with _lock:
+        for path in get_data_path().glob(f"*{suffix}"):
+            subject = path.name.removesuffix(suffix)
+
+            # Last line may be cut off by the crash
+            content = path.read_text(encoding="utf-8")
+            content = content[: content.rfind("\n") + 1]
+
+            # Lines of older versions have no batch and are always moved
+            batches: dict[str | None, dict[datetime.datetime, int]] = {}
+            for line in content.splitlines():
+                try:
+                    timestamp, seconds, *batch = line.split(",")
+                    timestamp = datetime.datetime.fromisoformat(timestamp)
+                    rows = batches.setdefault(batch[0] if batch else None, {})
+                    rows[timestamp] = rows.get(timestamp, 0) + int(seconds)
+                except ValueError:
+                    continue
+
+            # Hours of batches in the journal, a torn append may have cut a batch
+            flushed = _get_flushed_hours(subject)
+
+            create_subject(subject)
+            for batch, rows in batches.items():
+                rows = {
+                    timestamp: seconds
+                    for timestamp, seconds in rows.items()
+                    if (timestamp.isoformat(), batch) not in flushed
+                }
+                if rows:
+                    append_study_times(subject, rows, batch)
+            _remove_recovery(subject)
+            subjects.append(subject)
+
+    return subjects
+
+
+def _format_rows(rows: dict[datetime.datetime, int], batch: str | None = None) -> str:
+    """Returns rows as lines of the journal format, tagged with batch if given."""
+    tag = f",{batch}" if batch is not None else ""
+    return "".join(
+        f"{timestamp.isoformat()},{int(seconds)}{tag}\n"
+        for timestamp, seconds in rows.items()
+    )
+
+
+def _merge_into_partitions(
+    subject: str, journal: polars.DataFrame
+) -> list[tuple[pathlib.Path, pathlib.Path]]:
+    """Writes store partitions merged with journal rows to temporary files."""
+    replacements = []
+    journal = journal.select(polars.lit(subject).alias("subject"), polars.all())
+
+    with polars.StringCache():
+        # Only partitions of years present in the journal are rewritten
+        for (year,), rows in journal.group_by(polars.col("timestamp").dt.year()):
+            path = get_partition_path(year)
+            if path.exists():
+                partition = polars.read_parquet(path, hive_partitioning=False)
+            else:
+                partition = polars.DataFrame(schema=store_schema)
+
+            partition = (
+                polars.concat(
+                    [partition.cast({"subject": polars.String}), rows],
+                )
+                .group_by("subject", "timestamp")
+                .agg(polars.col("studied_seconds").sum())
+                .cast(store_schema)
+            )
+
+            temp_path = _get_temp_path(path)
+            write_data(partition, temp_path)
+            replacements.append((temp_path, path))
+
+    return replacements
+
+
+@traced("write")
+def compact_subject(subject: str) -> None:
+    """Merges the journal of a subject into its compacted data.
+
+    The journal is renamed first so appends go to a new journal meanwhile. The
+    new files are committed by writing a commit record before moving them in
+    place, so a crash at any point is finished or undone by recover_data().
+    """
+    journal_path = get_journal_path(subject)
+    compacting_path = get_compacting_journal_path(subject)
+
+    with _compaction_lock:
+        with _lock:
+            if get_commit_path(subject).exists():
+                _finish_commit(subject)
+
+            # Journal left by an interrupted compaction is merged first
+            if not compacting_path.exists():
+                if not journal_path.exists():
+                    return
+                os.replace(journal_path, compacting_path)
+
+            journal = _read_journal_file(compacting_path)
+            df = read_compacted(subject)
+
+        if journal.height == 0:
+            with _lock:
+                compacting_path.unlink()
+            return
+
+        df = merge_rows(polars.concat([df, journal]))
+        rollups = {i: build_rollup(df, i) for i in ROLLUP_INTERVALS}
+
+        # Write outside the lock so the GUI is never blocked on the rewrite
+        if is_consolidated():
+            replacements = _merge_into_partitions(subject, journal)
+        else:
+            path = get_subject_path(subject)
+            temp_path = _get_temp_path(path)
+            write_data(df, temp_path)
+            replacements = [(temp_path, path)]
+
+        # Same order as in read_series(), the series is rewritten below
+        with _series_lock, _lock:
+            old_state = get_file_state(subject)[:2]
+
+            # From here on the compaction counts as done, even after a crash
+            _write_json(
+                get_commit_path(subject),
+                [[str(temp_path), str(path)] for temp_path, path in replacements],
+            )
+            _finish_commit(subject)
+
+            write_rollups(subject, rollups)
+
+            # Keep the series and its prefix sums in sync with the new data
+            new_state = get_file_state(subject)[:2]
+            if is_consolidated():
+                _move_series_infos(old_state, new_state)
+            _write_series(subject, df, new_state)
+
+
+def _finish_commit(subject: str) -> None:
+    """Moves the files of a committed compaction in place and drops its journal.
+
+    Safe to repeat, files that were already moved are skipped.
+    """
+    commit_path = get_commit_path(subject)
+    replacements = json.loads(commit_path.read_text())
+
+    for temp_path, path in replacements:
+        if os.path.exists(temp_path):
+            os.replace(temp_path, path)
+            _fsync_dir(pathlib.Path(path).parent)
+            _remove_arrow_copies(pathlib.Path(path))
+
+    if is_consolidated():
+        _bump_store_version()
+
+    get_compacting_journal_path(subject).unlink(missing_ok=True)
+    commit_path.unlink()
+    _fsync_dir(get_data_path())
+
+
+def compact_subject_in_background(subject: str) -> None:
+    """Starts compaction of a subject on a background thread."""
+    with _lock:
+        if subject in _compacting:
+            return
+        _compacting.add(subject)
+
+    def run() -> None:
+        try:
+            compact_subject(subject)
+        finally:
+            with _lock:
+                _compacting.discard(subject)
+
+    threading.Thread(target=run, name=f"compact-{subject}", daemon=True).start()
+
+
+def migrate_to_consolidated_store() -> int:
+    """Moves all per-subject files into the consolidated store.
+
+    The original files are moved into the migrated directory instead of being
+    deleted. Returns the number of migrated subjects.
+    """
+    with _compaction_lock, _lock:
+        if is_consolidated():
+            return 0
+
+        subjects = get_all_subjects()
+        df = read_all_subjects()
+
+        # Build the store aside and move it in place once it is complete
+        temp_store_path = get_data_path() / "store.tmp"
+        shutil.rmtree(temp_store_path, ignore_errors=True)
+
+        with polars.StringCache():
+            for (year,), rows in df.cast(store_schema).group_by(
+                polars.col("timestamp").dt.year()
+            ):
+                write_data(
+                    rows, temp_store_path / STORE_PARTITION_FILE.format(year=year)
+                )
+
+        _write_json(temp_store_path / STORE_SUBJECTS_FILE, subjects)
+        (temp_store_path / STORE_VERSION_FILE).write_text("0")
+
+        migrated_path = get_data_path() / MIGRATED_DIR
+        migrated_path.mkdir(exist_ok=True)
+        for subject in subjects:
+            for path in (
+                get_subject_path(subject),
+                get_compacting_journal_path(subject),
+                get_journal_path(subject),
+            ):
+                if path.exists():
+                    os.replace(path, migrated_path / path.name)
+            _remove_arrow_copies(get_subject_path(subject))
+
+        os.replace(temp_store_path, get_store_path())
+
+        return len(subjects)
+
+
+def _bump_store_version() -> None:
+    """Changes the version file of the store to mark a finished compaction."""
+    path = get_store_path() / STORE_VERSION_FILE
+    try:
+        version = int(path.read_text())
+    except (FileNotFoundError, ValueError):
+        version = 0
+
+    _write_text(path, str(version + 1))
+
+
+def _write_json(path: pathlib.Path, data) -> None:
+    """Writes data as JSON, replacing the file only once it is fully written."""
+    _write_text(path, json.dumps(data))
+
+
+def _write_text(path: pathlib.Path, text: str) -> None:
+    """Writes text to a temporary file and moves it over path at once."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = _get_temp_path(path)
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    _fsync_dir(path.parent)
+
+
+def _get_temp_path(path: pathlib.Path) -> pathlib.Path:
+    """Returns path of the temporary file a new version of path is written to."""
+    return path.with_name(path.name + ".tmp")
+
+
+def _fsync(path: pathlib.Path) -> None:
+    """Flushes a written file to disk."""
+    with open(path, "rb+") as file:
+        os.fsync(file.fileno())
+
+
+def _fsync_dir(path: pathlib.Path) -> None:
+    """Flushes renames in a directory to disk."""
+    # Directories cannot be opened on Windows, where renames are durable anyway
+    if sys.platform == "win32":
+        return
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
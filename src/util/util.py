@@ -1,174 +1,147 @@
+import bisect
 import datetime
-import os
-import pathlib
-import sys
 
-import matplotlib.dates as mdates
+import numpy
 import polars
-from matplotlib.ticker import FuncFormatter
-from util.constants import DATA_DIR, DATA_FILE
+from util.profiling import span, traced
+from util.storage import get_all_subjects, read_rollup, read_series, read_subject
 
 
-def get_data_path() -> pathlib.Path:
-    base_data_dir: pathlib.Path
-    if sys.platform == "win32":
-        appdata_dir = os.getenv("LOCALAPPDATA") or os.getenv("APPDATA")
-        base_data_dir = pathlib.Path(appdata_dir) / "StudyTracker" / DATA_DIR
+def preprocess_data(
+    lf: polars.LazyFrame,
+    timestamp_start: datetime.datetime | None,
+    timestamp_end: datetime.datetime | None,
+    interval: str = "1h",
+) -> polars.LazyFrame:
+    """Preprocesses the data into a gap-free timeline with rows per interval."""
+
+    # Filter timestamps, bounds default to the range of the data
+    if timestamp_start is not None:
+        lf = lf.filter(polars.col("timestamp") >= timestamp_start)
+        range_start = polars.lit(timestamp_start, polars.Datetime("us"))
     else:
-        base_data_dir = (
-            pathlib.Path.home() / ".local" / "share" / "StudyTracker" / DATA_DIR
-        )
-
-    # Ensure directory exists
-    base_data_dir.mkdir(parents=True, exist_ok=True)
+        range_start = polars.col("timestamp").min()
 
-    return base_data_dir
+    if timestamp_end is not None:
+        lf = lf.filter(polars.col("timestamp") < timestamp_end)
+        range_end = polars.lit(timestamp_end, polars.Datetime("us"))
+    else:
+        # Include the interval of the last row
+        range_end = polars.col("timestamp").max().dt.offset_by(interval)
 
+    # Add timestamp data for each interval
+    full_range = lf.select(
+        polars.datetime_ranges(
+            range_start, range_end, interval, closed="left", time_unit="us"
+        )
+        .explode()
+        .alias("timestamp")
+    ).drop_nulls()
 
-def get_all_subjects() -> list[str]:
-    path = get_data_path()
-    subjects = [p.stem for p in path.glob("*.parquet")]
-    return subjects
+    # Fill missing values with 0
+    joined = full_range.join(lf, on="timestamp", how="left").with_columns(
+        polars.col("studied_seconds").fill_null(0)
+    )
 
+    return add_time_columns(joined)
 
-def preprocess_data(
-    df: polars.DataFrame,
-    timestamp_start: datetime.datetime | None,
-    timestamp_end: datetime.datetime | None,
-) -> polars.DataFrame:
-    """Preprocesses the data."""
 
-    df = df.with_columns(
+def add_time_columns(lf: polars.LazyFrame) -> polars.LazyFrame:
+    """Adds studied minutes and hours and the fields to group by."""
+    # Add fields to be able to group by date, month, and year
+    return lf.with_columns(
         [
             (polars.col("studied_seconds") / 60).alias("studied_minutes"),
             (polars.col("studied_seconds") / 3600).alias("studied_hours"),
+            polars.col("timestamp").dt.date().alias("date"),
+            polars.col("timestamp").dt.month().alias("month"),
+            polars.col("timestamp").dt.year().alias("year"),
         ]
     )
 
-    if len(df) != 0:
-        # Filter timestamps
-        if timestamp_start is not None:
-            df = df.filter(polars.col("timestamp") >= timestamp_start)
-        else:
-            timestamp_start = df["timestamp"].min()
-
-        if timestamp_end is not None:
-            df = df.filter(polars.col("timestamp") < timestamp_end)
-        else:
-            timestamp_end = df["timestamp"].max()
-
-        # Add timestamp data for hours
-        hours = []
-        current = timestamp_start
-        while current < timestamp_end:
-            hours.append(current)
-            current += datetime.timedelta(hours=1)
-
-        full_range = polars.DataFrame({"timestamp": hours})
-
-        # Fill missing values with 0
-        joined = full_range.join(df, on="timestamp", how="left")
-        joined = joined.with_columns(
-            [
-                polars.col("studied_seconds").fill_null(0),
-                polars.col("studied_minutes").fill_null(0),
-                polars.col("studied_hours").fill_null(0),
-            ]
-        )
-        # Add fields to be able to group by date, month, and year
-        joined = joined.with_columns(
-            [
-                polars.col("timestamp").dt.date().alias("date"),
-                polars.col("timestamp").dt.month().alias("month"),
-                polars.col("timestamp").dt.year().alias("year"),
-            ]
-        )
-        return joined
-    return df
-
 
+def add_rows_to_intervals(
+    boundaries: list[datetime.datetime],
+    seconds: numpy.ndarray,
+    rows: dict[datetime.datetime, int],
+) -> numpy.ndarray:
+    """Returns seconds per interval with seconds per hour added to their intervals.
+
+    Hours outside the boundaries are ignored.
+    """
+    seconds = seconds.copy()
+    for hour, added_seconds in rows.items():
+        if boundaries[0] <= hour < boundaries[-1]:
+            seconds[bisect.bisect_right(boundaries, hour) - 1] += added_seconds
+    return seconds
+
+
+@traced("query")
+def get_seconds_per_interval(
+    subject: str,
+    timestamp_start: datetime.datetime,
+    timestamp_end: datetime.datetime,
+    interval: str = "1h",
+) -> tuple[list[datetime.datetime], numpy.ndarray]:
+    """Returns bounds of the intervals in the window and studied seconds of each.
+
+    There is one more bound than intervals, the last one is the end of the window.
+    """
+    boundaries = polars.datetime_range(
+        timestamp_start,
+        timestamp_end,
+        interval,
+        closed="left",
+        time_unit="us",
+        eager=True,
+    ).to_list() + [timestamp_end]
+    return boundaries, read_series(subject).get_sums(boundaries)
+
+
+@traced("query")
 def get_processed_df_from_subject(
-    subject: str, timestamp_start=None, timestamp_end=None
+    subject: str, timestamp_start=None, timestamp_end=None, interval: str = "1h"
 ):
-    """Returns processed DataFrame of subject."""
-    data_path = get_data_path() / DATA_FILE.format(subject_name=subject)
-
-    df = polars.read_parquet(data_path)
-
-    df_processed = preprocess_data(df, timestamp_start, timestamp_end)
-
-    return df_processed
-
-
-def custom_date_formatter(timestamps: list[datetime.datetime], zoom_level: str):
-    # Defensive empty check
-    if not timestamps:
-        return FuncFormatter(lambda x, _: "")
-
-    def formatter(x, _):
-        dt = mdates.num2date(x).replace(tzinfo=None)
-
-        if zoom_level == "Day":
-            # Show hour
-            return dt.strftime("%H")
-
-        elif zoom_level == "Week":
-            # Show weekday name
-            return dt.strftime("%A")
-
-        elif zoom_level == "Month":
-            # Show just month and day
-            return dt.strftime("%d")
-
-        elif zoom_level == "Year":
-            # Show month and year
-            return dt.strftime("%b")
-
-        else:
-            return dt.strftime("%Y-%m-%d %H:%M")
-
-    return FuncFormatter(formatter)
-
-
-def set_xaxis_labels(ax, timestamps: list[datetime.datetime], zoom_level: str):
-    ax.xaxis.set_major_formatter(custom_date_formatter(timestamps, zoom_level))
-
-    if not timestamps:
-        return
-
-    max_ticks = 12
-
-    if zoom_level == "Day":
-        # For day zoom, show hourly ticks (assumed timestamps cover the day hourly)
-        start = timestamps[0].replace(minute=0, second=0, microsecond=0)
-        end = timestamps[-1].replace(minute=0, second=0, microsecond=0)
-        hours = []
-        current = start
-        while current <= end:
-            hours.append(current)
-            current += datetime.timedelta(hours=1)
-        ax.set_xticks([mdates.date2num(h) for h in hours])
-        ax.tick_params(axis="x", rotation=30)
-        return
-
-    # For other zoom levels, pick evenly spaced ticks from timestamps
-    n = len(timestamps)
-    if n <= max_ticks:
-        selected_indexes = list(range(n))
+    """Returns processed DataFrame of subject with rows per interval."""
+    if interval == "1h":
+        df = read_subject(subject, timestamp_start, timestamp_end)
     else:
-        step = n // max_ticks
-        selected_indexes = list(range(0, n, step))
-        # Make sure last index is included
-        if selected_indexes[-1] != n - 1:
-            selected_indexes.append(n - 1)
-
-    selected_locs = [mdates.date2num(timestamps[i]) for i in selected_indexes]
-
-    ax.set_xticks(selected_locs)
-    ax.tick_params(axis="x", rotation=30)
-
-
-def ease_in_out_quad(frame):
-    if frame < 0.5:
-        return 2 * frame * frame
-    return -1 + (4 - 2 * frame) * frame
+        df = read_rollup(subject, interval, timestamp_start, timestamp_end)
+
+    with span("preprocess_data", "process"):
+        return preprocess_data(
+            df.lazy(), timestamp_start, timestamp_end, interval
+        ).collect()
+
+
+def get_studied_seconds(
+    subject: str,
+    timestamp_start: datetime.datetime | None = None,
+    timestamp_end: datetime.datetime | None = None,
+) -> int:
+    """Returns studied seconds of subject in the window, of all time without bounds.
+
+    Two lookups in the prefix sums of the subject, however long its history is.
+    """
+    return read_series(subject).get_total(timestamp_start, timestamp_end)
+
+
+def get_total_hours_from_subject(
+    subject: str,
+    timestamp_start: datetime.datetime | None = None,
+    timestamp_end: datetime.datetime | None = None,
+) -> float:
+    """Returns studied hours of subject in the window, of all time without bounds."""
+    return get_studied_seconds(subject, timestamp_start, timestamp_end) / 3600
+
+
+@traced("query")
+def get_total_hours_of_all_subjects(
+    timestamp_start: datetime.datetime | None = None,
+    timestamp_end: datetime.datetime | None = None,
+) -> dict[str, float]:
+    """Returns studied hours of each subject in the window, or of all time."""
+    return {
+        subject: get_total_hours_from_subject(subject, timestamp_start, timestamp_end)
+        for subject in get_all_subjects()
+    }